@@ -16,19 +16,18 @@
 # - LIBAPPS_USERNAME [with `--update` only]
 # - LIBAPPS_PASSWORD [with `--update` only]
 
-# USAGE: python asset_proxy_cleanup.py [--update]
-
-import json
-import requests
-import urllib.parse
-
-from decouple import config  # pypi python-decouple
+# USAGE: python asset_proxy_cleanup.py [--update [--workers N] [--backend browser|http] [--resume]] [--snapshot [--since SNAPSHOT_ID]] [--report FILE]
+#
+# With `--snapshot`, assets are read from the local snapshot maintained by
+# `libguides_snapshot.py sync` instead of the API; `--since` limits the report
+# to assets added or changed after that snapshot. With `--report`, the assets
+# that need changes are also written to a `.csv` or `.json` file. Playwright is
+# only loaded with `--update`.
 
-from playwright.sync_api import (
-    expect,
-    sync_playwright,
-    TimeoutError as PlaywrightTimeoutError,
-)
+from edit_planner import EditPlanner, PlanWriter
+from libguides_api import LibGuidesAPI
+from libguides_snapshot import LibGuidesSnapshot
+from proxy_matcher import ProxyMatcher
 
 types = {
     1: "Rich Text / HTML",
@@ -46,165 +45,60 @@ types = {
     14: "Remote Script",
 }
 
+CHECKED_TYPES = ("Link", "Book from the Catalog", "Database")
+
 
 def main(
     update: ("update records", "flag", "u"),  # type: ignore
     dry_run: ("mock update without saving", "flag", "d"),  # type: ignore
+    snapshot: ("read assets from the local snapshot", "flag", "s"),  # type: ignore
+    since: ("only assets changed after this snapshot id", "option", "since", int) = None,  # type: ignore
+    report: ("write the report to a .csv or .json file", "option", "r") = None,  # type: ignore
+    workers: ("number of browser workers for updates", "option", "w", int) = 1,  # type: ignore
+    backend: ("edit with the browser or by replaying the edit form over HTTP", "option", "b", str, ["browser", "http"]) = "browser",  # type: ignore
+    resume: ("skip edits already done in the latest run journal", "flag", "resume") = False,  # type: ignore
 ):
 
-    # LibGuides API Response
-    response = requests.get(
-        "https://lgapi-us.libapps.com/1.1/assets",
-        params={
-            "site_id": config("LIBGUIDES_API_SITE_ID"),
-            "key": config("LIBGUIDES_API_KEY"),
-        },
-    )
+    if snapshot:
+        # NOTE only the asset types checked below are read from the snapshot
+        data = LibGuidesSnapshot().assets(
+            since=since,
+            type_id=[k for k, v in types.items() if v in CHECKED_TYPES],
+        )
+    else:
+        # LibGuides API Response; assets are parsed one at a time as they download
+        data = LibGuidesAPI().iter_assets()
+    matcher = ProxyMatcher.from_settings(["PROXY_PREFIXES"])
+
+    # NOTE only the planned edits are kept for the browser, so the API
+    # connection is not held open during slow edits
+    planner = EditPlanner(matcher)
+    with PlanWriter(report) as report_writer:
+        for asset in data:
+            if types.get(asset["type_id"]) not in CHECKED_TYPES:
+                continue
+            row = planner.plan_asset(asset, types)
+            if not row:
+                continue
+            print_asset(asset, row["use_proxy"])
+            if row["replace_url"]:
+                print("➡️  Replace URL", row["replace_url"])
+            if row["toggle_proxy"]:
+                exception = f" [Exception: {row['exception_domain']}]" if row["exception_domain"] else ""
+                print(f"➡️  Toggle “Use Proxy?” to {row['toggle_proxy']}{exception}")
+            report_writer.write(row)
+    print("")
+    planner.summary()
+
+    if update:
+        update_assets(planner.edits(), dry_run, workers, backend, resume)
 
-    # Parse Response
-    data = json.loads(response.text)
-
-    with sync_playwright() as playwright:
-        try:
-            if update:
-                if dry_run:
-                    print("\n🐞 DRY RUN: no changes will be saved")
-                browser = playwright.firefox.launch()
-                page = browser.new_page(
-                    base_url=config("LIBAPPS_BASE_URL"),
-                    record_video_dir="_outputs",
-                )
-                page.goto("/libapps/login.php")
-                page.fill("#s-libapps-email", config("LIBAPPS_USERNAME"))
-                page.fill("#s-libapps-password", config("LIBAPPS_PASSWORD"))
-                page.click("#s-libapps-login-button")
-                page.wait_for_load_state("networkidle")
-            for asset in data:
-                if (
-                    types[asset["type_id"]] != "Link"
-                    and types[asset["type_id"]] != "Book from the Catalog"
-                    and types[asset["type_id"]] != "Database"
-                ):
-                    continue
-                # NOTE reset loop variables
-                toggled = ""
-                use_proxy = "No"
-                if "meta" in asset and asset["meta"]:
-                    if asset["meta"].get("enable_proxy", ""):
-                        use_proxy = "Yes"
-                proxy_prefix = contains_proxy_prefix(asset["url"])
-                exception_domain = contains_exception_domain(asset["url"])
-                if proxy_prefix:
-                    print_asset(asset, use_proxy)
-                    working_url = urllib.parse.unquote(
-                        asset["url"].replace(proxy_prefix, "")
-                    )
-                    if not update:
-                        print("➡️  Replace URL", working_url)
-                        if not exception_domain and use_proxy == "No":
-                            print("➡️  Toggle “Use Proxy?” to Yes")
-                        elif exception_domain and use_proxy == "Yes":
-                            print(f"[Exception: {exception_domain}]")
-                            print("➡️  Toggle “Use Proxy?” to No")
-                    elif update:
-                        if types[asset["type_id"]] == "Database":
-                            page.goto("/libguides/az.php")
-                        else:
-                            page.goto("/libguides/assets.php")
-                        # NOTE reset search
-                        page.get_by_role("textbox", name="ID").fill("")
-                        page.keyboard.up("ArrowRight")
-                        expect(page.get_by_role("status")).to_contain_text(
-                            "Showing 1 to 25"
-                        )
-                        page.get_by_role("textbox", name="ID").fill(str(asset["id"]))
-                        page.keyboard.up("ArrowRight")
-                        expect(page.get_by_role("status")).to_contain_text(
-                            "Showing 1 to 1 of 1 entries"
-                        )
-                        page.screenshot(
-                            path=f'_outputs/{asset["id"]}-filtered.png'
-                        )
-                        page.get_by_title("Edit Item").click()
-                        page.locator("#form-group-enable_proxy").wait_for()
-                        page.screenshot(
-                            path=f'_outputs/{asset["id"]}-pre-edit.png'
-                        )
-                        if "Link" in types[asset["type_id"]]:
-                            page.get_by_label("Link URL").fill(working_url)
-                        elif "Book" in types[asset["type_id"]]:
-                            page.get_by_role("textbox", name="URL", exact=True).fill(
-                                working_url
-                            )
-                        if not exception_domain and use_proxy == "No":
-                            # NOTE clicking the label rather than the input works
-                            page.locator("#label-enable_proxy_1").click()
-                            toggled = "☑️  Toggled “Use Proxy?” to Yes"
-                        elif exception_domain and use_proxy == "Yes":
-                            # NOTE clicking the label rather than the input works
-                            page.locator("#label-enable_proxy_0").click()
-                            toggled = f"☑️  Toggled “Use Proxy?” to No [Exception: {exception_domain}]"
-                        page.screenshot(
-                            path=f'_outputs/{asset["id"]}-pre-save.png'
-                        )
-                        if dry_run:
-                            page.get_by_role("button", name="Cancel").click()
-                        else:
-                            page.get_by_role("button", name="Save").click()
-                        print("☑️  Replaced URL", working_url)
-                        if toggled:
-                            print(toggled)
-                elif exception_domain and use_proxy == "Yes":
-                    print_asset(asset, use_proxy)
-                    if not update:
-                        print(
-                            f"➡️  Toggle “Use Proxy?” to No [Exception: {exception_domain}]"
-                        )
-                    if update:
-                        if types[asset["type_id"]] == "Database":
-                            page.goto("/libguides/az.php")
-                        else:
-                            page.goto("/libguides/assets.php")
-                        # NOTE reset search
-                        page.get_by_role("textbox", name="ID").fill("")
-                        page.keyboard.up("ArrowRight")
-                        expect(page.get_by_role("status")).to_contain_text(
-                            "Showing 1 to 25"
-                        )
-                        page.get_by_role("textbox", name="ID").fill(str(asset["id"]))
-                        page.keyboard.up("ArrowRight")
-                        expect(page.get_by_role("status")).to_contain_text(
-                            "Showing 1 to 1 of 1 entries"
-                        )
-                        page.screenshot(
-                            path=f'_outputs/{asset["id"]}-filtered.png'
-                        )
-                        page.get_by_title("Edit Item").click()
-                        page.locator("#form-group-enable_proxy").wait_for()
-                        page.screenshot(
-                            path=f'_outputs/{asset["id"]}-pre-edit.png'
-                        )
-                        # NOTE clicking the label rather than the input works
-                        page.locator("#label-enable_proxy_0").click()
-                        page.screenshot(
-                            path=f'_outputs/{asset["id"]}-pre-save.png'
-                        )
-                        if dry_run:
-                            page.get_by_role("button", name="Cancel").click()
-                        else:
-                            page.get_by_role("button", name="Save").click()
-                        print(
-                            f"☑️  Toggled “Use Proxy?” to No [Exception: {exception_domain}]"
-                        )
-            if update:
-                browser.close()
-                if dry_run:
-                    print("\n🐞 DRY RUN: no changes were saved")
-            print("")
-        except PlaywrightTimeoutError as e:
-            print(e)
-            if update:
-                browser.close()
+
+def update_assets(edits, dry_run, workers, backend, resume):
+    # NOTE Playwright is only imported and started when updates are applied
+    from libapps_browser import EditExecutor
+
+    EditExecutor(workers=workers, output_dir="_outputs/asset_proxy_cleanup", dry_run=dry_run, backend=backend, resume=resume).run(edits)
 
 
 def print_asset(asset, use_proxy):
@@ -218,20 +112,6 @@ def print_asset(asset, use_proxy):
     print(asset["url"])
 
 
-def contains_proxy_prefix(url):
-    for prefix in config("PROXY_PREFIXES").split(","):
-        if prefix in url:
-            return prefix
-    return False
-
-
-def contains_exception_domain(url):
-    for domain in config("EXCEPTION_DOMAINS").split(","):
-        if domain in url:
-            return domain
-    return False
-
-
 if __name__ == "__main__":
     # fmt: off
     import plac; plac.call(main)
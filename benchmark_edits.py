@@ -0,0 +1,216 @@
+# file: benchmark_edits.py
+
+# USAGE: python benchmark_edits.py [--assets 2000] [--latency 0.05] [--workers 4] [--backend browser|http] [--rate N] [--scripts NAMES] [--output-dir DIR]
+
+# This script runs the edit scripts end to end against `mock_libapps.py` and
+# reports their throughput, so changes to them can be measured and checked
+# without touching production LibGuides.
+#
+# Each script gets a fresh mock server with `--assets` synthetic assets and
+# runs in its own working directory under `--output-dir`, with settings that
+# point it at the mock server passed as environment variables:
+#
+# - `asset_proxy_cleanup.py --update` plans its edits from the mock API
+# - `url_proxy_decode.py` reads a CSV export of all mock assets
+# - `links.py` reads a CSV that gives every Link asset a new URL
+#
+# After each run the script's run journal is read for the per-step latency of
+# its edits, and every edit it planned is checked against the mock server's
+# data. The summary reports assets per minute (saved edits per minute of
+# wall time, including login and planning) and the p50/p95 latency of each
+# step. Each script's output is kept in `run.log` in its working directory.
+
+import csv
+import datetime
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from pathlib import Path
+
+import mock_libapps
+
+from libapps_trace import percentile
+
+SCRIPTS = ("asset_proxy_cleanup", "url_proxy_decode", "links")
+PREFIX = "https://proxy.example.edu/login?url="
+FORMER_PREFIX = "https://login.proxy.example.org/login?url="
+EXCEPTION_DOMAINS = ("resource7.example.com", "resource49.example.com", "resource343.example.com")
+
+
+def write_asset_export(path, assets):
+    """Write the assets like the LibGuides asset list export read by `url_proxy_decode.py`."""
+    with open(path, "w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.DictWriter(f, fieldnames=["ID", "Type", "Name", "URL", "proxy_toggle"])
+        writer.writeheader()
+        for asset in assets.values():
+            writer.writerow(
+                {
+                    "ID": asset["id"],
+                    "Type": mock_libapps.TYPES[asset["type_id"]],
+                    "Name": asset["name"],
+                    "URL": asset["url"],
+                    "proxy_toggle": asset["meta"]["enable_proxy"],
+                }
+            )
+
+
+def new_link_url(asset):
+    return f"https://links.example.com/moved/{asset['id']}"
+
+
+def write_link_updates(path, assets):
+    """Write a `links.py` CSV that moves every Link asset to a new URL."""
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=["Name", "URL", "NewURL"])
+        writer.writeheader()
+        for asset in assets.values():
+            if mock_libapps.TYPES[asset["type_id"]] == "Link":
+                writer.writerow({"Name": asset["name"], "URL": asset["url"], "NewURL": new_link_url(asset)})
+
+
+def is_applied(edit, assets):
+    """Whether the mock server's asset shows the changes of a planned edit."""
+    asset = assets.get(int(edit["asset_id"] or 0))
+    if not asset:
+        return False
+    if edit["replace_url"] and asset["url"] != edit["replace_url"]:
+        return False
+    if edit["toggle_proxy"] and bool(asset["meta"]["enable_proxy"]) != (edit["toggle_proxy"] == "Yes"):
+        return False
+    return True
+
+
+def read_journal(workdir):
+    """The planned edits and the final record of each edit in the script's run journal."""
+    planned = {}
+    records = {}
+    for path in workdir.glob("_outputs/**/edits-*.jsonl"):
+        with open(path) as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    if entry["status"] == "planned":
+                        planned[entry["key"]] = entry["edit"]
+                    else:
+                        records[entry["key"]] = entry
+    return planned, list(records.values())
+
+
+def benchmark(script, workdir, assets, latency, workers, backend, rate):
+    workdir.mkdir(parents=True, exist_ok=True)
+    server = mock_libapps.serve(0, assets, PREFIX, latency=latency)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    state = server.state
+    env = {
+        **os.environ,
+        "LIBAPPS_BASE_URL": base_url,
+        "LIBGUIDES_API_BASE_URL": f"{base_url}/1.1",
+        "LIBAPPS_USERNAME": "benchmark@example.edu",
+        "LIBAPPS_PASSWORD": "benchmark",
+        "LIBGUIDES_API_SITE_ID": "1",
+        "LIBGUIDES_API_KEY": "benchmark",
+        "PROXY_PREFIXES": PREFIX,
+        "CURRENT_PREFIX": PREFIX,
+        "FORMER_PREFIX": FORMER_PREFIX,
+        "EXCEPTION_DOMAINS": ",".join(EXCEPTION_DOMAINS),
+        "LIBAPPS_RETRY_BACKOFF": "1",
+        # NOTE keep API responses and sessions from other servers out of the run
+        "LIBGUIDES_API_CACHE_DIR": str((workdir / "_cache/libguides_api").resolve()),
+        "LIBAPPS_SESSION_FILE": str((workdir / "_cache/libapps_session.json").resolve()),
+    }
+    if rate:
+        # NOTE pin the adaptive limiter to one rate so runs are comparable
+        env.update({"LIBAPPS_RATE": str(rate), "LIBAPPS_MIN_RATE": str(rate), "LIBAPPS_MAX_RATE": str(rate)})
+    args = ["--workers", str(workers), "--backend", backend]
+    if script == "asset_proxy_cleanup":
+        args = ["--update", *args]
+    elif script == "url_proxy_decode":
+        write_asset_export(workdir / "assets.csv", state.assets)
+        args.append("assets.csv")
+    else:
+        write_link_updates(workdir / "links.csv", state.assets)
+        args.append("links.csv")
+    print(f"🏁 {script} on {base_url} with {assets} assets")
+    started = time.monotonic()
+    with open(workdir / "run.log", "w") as log:
+        completed = subprocess.run(
+            [sys.executable, str(Path(__file__).with_name(f"{script}.py")), *args],
+            cwd=workdir,
+            env=env,
+            stdout=log,
+            stderr=subprocess.STDOUT,
+        )
+    seconds = time.monotonic() - started
+    server.shutdown()
+    server.server_close()
+    planned, records = read_journal(workdir)
+    steps = {}
+    for record in records:
+        for name, step_seconds in record["steps"].items():
+            steps.setdefault(name, []).append(step_seconds)
+    counts = {}
+    for record in records:
+        counts[record["status"]] = counts.get(record["status"], 0) + 1
+    return {
+        "script": script,
+        "exit_code": completed.returncode,
+        "seconds": round(seconds, 1),
+        "counts": counts,
+        "assets_per_minute": round(counts.get("saved", 0) / seconds * 60, 1),
+        "remaining": sum(1 for edit in planned.values() if not is_applied(edit, state.assets)),
+        "steps": {
+            name: {
+                "count": len(values),
+                "p50": round(percentile(sorted(values), 50), 3),
+                "p95": round(percentile(sorted(values), 95), 3),
+            }
+            for name, values in steps.items()
+        },
+    }
+
+
+def main(
+    assets: ("number of synthetic assets", "option", "a", int) = 2000,  # type: ignore
+    latency: ("mean seconds the mock server adds to every response", "option", "l", float) = 0.05,  # type: ignore
+    workers: ("number of workers per script", "option", "w", int) = 4,  # type: ignore
+    backend: ("edit with the browser or by replaying the edit form over HTTP", "option", "b", str, ["browser", "http"]) = "browser",  # type: ignore
+    rate: ("fixed requests per second instead of the adaptive rate", "option", "r", float) = None,  # type: ignore
+    scripts: ("comma-delimited scripts to run", "option", "s") = ",".join(SCRIPTS),  # type: ignore
+    output_dir: ("directory for the working directories and results", "option", "o") = "_outputs/benchmark",  # type: ignore
+):
+    names = [s.strip().removesuffix(".py") for s in scripts.split(",") if s.strip()]
+    for name in names:
+        if name not in SCRIPTS:
+            raise SystemExit(f"❌ unknown script: {name}")
+    run_dir = Path(output_dir).joinpath(datetime.datetime.now().isoformat(timespec="seconds").replace(":", ""))
+    results = []
+    for name in names:
+        result = benchmark(name, run_dir / name, assets, latency, workers, backend, rate)
+        results.append(result)
+        status = "✅" if result["exit_code"] == 0 and not result["remaining"] else "❌"
+        print(
+            f"{status} {name}: {result['assets_per_minute']} assets/min;"
+            f" {', '.join(f'{v} {k}' for k, v in sorted(result['counts'].items())) or 'no edits'};"
+            f" {result['remaining']} edits not applied; {result['seconds']}s (exit {result['exit_code']})"
+        )
+        for step, timing in result["steps"].items():
+            print(f"   ⏱️  {step}: {timing['count']}× p50 {timing['p50']:.2f}s p95 {timing['p95']:.2f}s")
+    with open(run_dir / "results.json", "w") as f:
+        json.dump(
+            {"assets": assets, "latency": latency, "workers": workers, "backend": backend, "rate": rate, "results": results},
+            f,
+            indent=2,
+        )
+    print(f"\n📝 results in {run_dir / 'results.json'}")
+    if any(r["exit_code"] or r["remaining"] for r in results):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    # fmt: off
+    import plac; plac.call(main)
@@ -0,0 +1,161 @@
+# file: edit_planner.py
+
+# Shared planner for the proxy edits made by `asset_proxy_cleanup.py` and
+# `url_proxy_decode.py`. Assets from the API or rows from a CSV export are
+# turned into a deduplicated list of minimal edits before any browser is
+# opened: the unquoted target URL and the desired “Use Proxy?” setting are
+# computed up front, and edits that would not change anything are dropped.
+# The plan can be written to a `.csv` or `.json` file for review (`PlanWriter`
+# also writes the `--report` of `asset_proxy_cleanup.py`), and only the
+# planned edits are handed to the executor in `libapps_browser.py`.
+
+import csv
+import json
+
+from pathlib import Path
+from typing import NamedTuple, Optional, Union
+
+PLAN_FIELDS = [
+    "id",
+    "type",
+    "name",
+    "url",
+    "use_proxy",
+    "proxy_prefix",
+    "replace_url",
+    "toggle_proxy",
+    "exception_domain",
+]
+
+
+class AssetEdit(NamedTuple):
+    asset_id: Optional[Union[int, str]]
+    # asset type name, e.g. "Link", "Book from the Catalog", or "Database"
+    asset_type: str
+    replace_url: str = ""
+    # "Yes", "No", or "" to leave “Use Proxy?” unchanged
+    toggle_proxy: str = ""
+    # locate the asset by its current URL rather than its ID
+    find_url: str = ""
+    # printed with the result, e.g. the matching exception domain
+    note: str = ""
+
+
+def row_edit(row):
+    """The `AssetEdit` for a plan row."""
+    return AssetEdit(
+        asset_id=row["id"],
+        asset_type=row["type"],
+        replace_url=row["replace_url"],
+        toggle_proxy=row["toggle_proxy"],
+        note=f"Exception: {row['exception_domain']}" if row["toggle_proxy"] == "No" and row["exception_domain"] else "",
+    )
+
+
+class EditPlanner:
+    """Collect the minimal edits for a set of assets.
+
+    URLs with an exception domain should not use the proxy and URLs with a
+    proxy prefix should. For other URLs, `unprefixed_use_proxy` is the
+    desired setting, or None to leave the current setting alone.
+    """
+
+    def __init__(self, matcher, unprefixed_use_proxy=None):
+        self.matcher = matcher
+        self.unprefixed_use_proxy = unprefixed_use_proxy
+        self.rows = {}
+        self.unchanged = 0
+        self.duplicates = 0
+
+    def plan(self, asset_id, asset_type, name, url, use_proxy):
+        """Plan the edit for one asset; return its plan row, or None when nothing changes."""
+        match = self.matcher.classify_one(url)
+        if match.exception_domain:
+            desired = False
+        elif match.prefix:
+            desired = True
+        elif self.unprefixed_use_proxy is None:
+            desired = use_proxy
+        else:
+            desired = self.unprefixed_use_proxy
+        replace_url = match.target_url if match.prefix and match.target_url != url else ""
+        toggle_proxy = ("Yes" if desired else "No") if desired != use_proxy else ""
+        if not replace_url and not toggle_proxy:
+            self.unchanged += 1
+            return None
+        row = {
+            "id": asset_id,
+            "type": asset_type,
+            "name": name,
+            "url": url,
+            "use_proxy": "Yes" if use_proxy else "No",
+            "proxy_prefix": match.prefix or "",
+            "replace_url": replace_url,
+            "toggle_proxy": toggle_proxy,
+            "exception_domain": match.exception_domain or "",
+        }
+        key = str(asset_id)
+        if key in self.rows:
+            self.duplicates += 1
+            if self.rows[key] != row:
+                print(f"⚠️  {asset_id} is listed more than once with different values; keeping the first")
+            return None
+        self.rows[key] = row
+        return row
+
+    def plan_asset(self, asset, types):
+        """Plan the edit for an asset dict from the LibGuides API."""
+        return self.plan(
+            asset["id"],
+            types[asset["type_id"]],
+            asset["name"],
+            asset["url"],
+            bool((asset.get("meta") or {}).get("enable_proxy")),
+        )
+
+    def edits(self):
+        return [row_edit(row) for row in self.rows.values()]
+
+    def summary(self):
+        print(f"🗒️  {len(self.rows)} edits planned; {self.unchanged} unchanged, {self.duplicates} duplicates skipped")
+
+    def export(self, path):
+        with PlanWriter(path) as writer:
+            for row in self.rows.values():
+                writer.write(row)
+
+
+class PlanWriter:
+    """Write plan or report rows to CSV or JSON as they are produced; a no-op without a path."""
+
+    def __init__(self, path):
+        self.path = path
+        self.format = Path(path).suffix.lower().lstrip(".") if path else None
+        if self.format not in (None, "csv", "json"):
+            raise SystemExit(f"❌ unsupported file format: {path}")
+        self.file = None
+        self.count = 0
+
+    def __enter__(self):
+        if self.path:
+            self.file = open(self.path, "w", newline="")
+            if self.format == "csv":
+                self.csv_writer = csv.DictWriter(self.file, fieldnames=PLAN_FIELDS)
+                self.csv_writer.writeheader()
+            else:
+                self.file.write("[")
+        return self
+
+    def write(self, row):
+        if self.format == "csv":
+            self.csv_writer.writerow(row)
+        elif self.format == "json":
+            self.file.write(f"{',' if self.count else ''}\n  {json.dumps(row)}")
+        self.count += 1
+
+    def __exit__(self, *exc_info):
+        if self.file:
+            if self.format == "json":
+                self.file.write("\n]\n")
+            self.file.close()
+            print(f"\n📝 {self.count} assets written to {self.path}")
@@ -1,52 +1,73 @@
+# file: ezproxy_links_guide_owners.py
+
+# USAGE: python ezproxy_links_guide_owners.py [--snapshot]
+
+# This script joins `in.csv` (copied from LibGuides > Tools > Search & Replace)
+# with guide owners and appends the rows to `out.csv`. With `--snapshot`, guides
+# are read from the local snapshot (see `libguides_snapshot.py`) instead of the
+# API. Only the guides listed in `in.csv` are requested from the API. Guides
+# are indexed by ID once, and rows whose GuideID matches no guide are written
+# without an owner and listed at the end.
+
 import csv
-import json
 
-import requests
+from libguides_api import LibGuidesAPI
+from libguides_snapshot import LibGuidesSnapshot
 
-from decouple import config
 
-payload = {
-    "site_id": config("LIBGUIDES_API_SITE_ID"),
-    "key": config("LIBGUIDES_API_KEY"),
-    "expand": "owner",
-}
-response = requests.get("https://lgapi-us.libapps.com/1.1/guides", params=payload)
-data = json.loads(response.text)
+def owners_by_guide_id(guides):
+    """Map each guide ID (as text, like `in.csv`) to its owner."""
+    return {str(guide["id"]): guide.get("owner") or {} for guide in guides}
 
 
-def search_nested_dicts(nested_dicts, search_strings):
-    results = []
-    for d in nested_dicts:
-        for k, v in d.items():
-            if any(s in str(v) for s in search_strings):
-                results.append(d)
-            if isinstance(v, dict):
-                results.extend(search_nested_dicts([v], search_strings))
-    return results
+def main(
+    snapshot: ("read guides from the local snapshot", "flag", "s"),  # type: ignore
+):
+    with open("in.csv") as csv_in:
+        guide_ids = {row["GuideID"].strip() for row in csv.DictReader(csv_in)}
+    if snapshot:
+        guides = LibGuidesSnapshot().guides()
+    else:
+        # NOTE only the guides listed in `in.csv` are requested
+        guides = LibGuidesAPI().guides(guide_ids=guide_ids, fields=["id", "owner"], expand="owner")
+    owners = owners_by_guide_id(guides)
 
+    matched = 0
+    unmatched = []
+    with open("in.csv") as csv_in:
+        # NOTE `in.csv` is created from copying the Outer HTML from the
+        # Search Results table in LibGuides > Tools > Search & Replace
 
-# results = search_nested_dicts(data, assets)
+        reader = csv.DictReader(csv_in)
 
-with open("in.csv") as csv_in:
-    # NOTE `in.csv` is created from copying the Outer HTML from the
-    # Search Results table in LibGuides > Tools > Search & Replace
+        with open("out.csv", "a", newline="") as csv_out:
+            writer = csv.writer(csv_out)
+            writer.writerow(["url", "name", "owner_name", "owner_email"])
 
-    reader = csv.DictReader(csv_in)
+            for row in reader:
+                print(row["GuideID"])
+                owner = owners.get(row["GuideID"].strip())
+                if owner is None:
+                    print("❓ no guide found")
+                    unmatched.append(row["GuideID"])
+                    owner = {}
+                else:
+                    matched += 1
+                writer.writerow(
+                    [
+                        row["URL"],
+                        row["Guide Mappings"],
+                        " ".join(filter(None, [owner.get("first_name"), owner.get("last_name")])),
+                        owner.get("email", ""),
+                    ]
+                )
 
-    with open("out.csv", "a", newline="") as csv_out:
-        writer = csv.writer(csv_out)
-        writer.writerow(["url", "name", "owner_name", "owner_email"])
+    print(f"\n{matched} rows joined; {len(unmatched)} rows with no matching guide")
+    if unmatched:
+        print("❓", ", ".join(unmatched))
+    print("🙃 join complete!")
 
-        for row in reader:
-            print(row["GuideID"])
-            guide_data = search_nested_dicts(data, [row["GuideID"]])
-            writer.writerow(
-                [
-                    row["URL"],
-                    row["Guide Mappings"],
-                    f'{guide_data[0]["owner"]["first_name"]} {guide_data[0]["owner"]["last_name"]}',
-                    guide_data[0]["owner"]["email"],
-                ]
-            )
 
-print("🙃 join complete!")
+if __name__ == "__main__":
+    # fmt: off
+    import plac; plac.call(main)
@@ -0,0 +1,249 @@
+# file: guides_layout.py
+
+# USAGE: python guides_layout.py [--rules update|revert|FILE.csv] [--workers N] [--refresh] [--dry-run] GROUP_IDS
+
+# This script migrates the Guide Navigation Layout of the guides in the given
+# comma-delimited LibGuides groups according to a mapping table of layouts.
+# `guides_template_updates.py` and `guides_template_revert.py` run it with
+# the built-in `update` and `revert` rules.
+#
+# A rules CSV has the columns "from" and "to". "from" is a layout name or a
+# glob pattern (e.g. `Caltech Library - Guides - *`); an empty "to" marks
+# layouts that are already in the desired state. The first matching rule
+# applies.
+#
+# Each guide's layout is read once, and read again after a change is saved.
+# The layout confirmed for each guide (read as already final, or read back
+# after saving) is kept in a local cache, and guides cached in a final state
+# are skipped on reruns unless `--refresh` is given. Only a POST to
+# `LIBAPPS_GUIDE_LAYOUT_SAVE_PATTERN` counts as the save. Guides are
+# processed by `--workers` browser pages at once, paced by the shared adaptive
+# rate limiter (see `rate_limiter.py`). Page actions are traced to a
+# `spans-layouts-*.jsonl` file in `_outputs` (see `libapps_trace.py`).
+
+# Required values in `settings.ini` include:
+#
+# - LIBGUIDES_API_SITE_ID
+# - LIBGUIDES_API_KEY
+# - LIBAPPS_BASE_URL
+# - LIBAPPS_USERNAME
+# - LIBAPPS_PASSWORD
+#
+# Optional values in `settings.ini` include:
+#
+# - LIBAPPS_GUIDE_LAYOUT_CACHE [default: _cache/guide_layouts.json]
+# - LIBAPPS_GUIDE_LAYOUT_SAVE_PATTERN [regex for the layout save request path; default: /libguides/\w+_process\.php]
+
+import csv
+import datetime
+import fnmatch
+import json
+import queue
+import re
+import threading
+import traceback
+
+from pathlib import Path
+
+from decouple import config  # pypi python-decouple
+from playwright.sync_api import (
+    sync_playwright,
+    Error as PlaywrightError,
+    TimeoutError as PlaywrightTimeoutError,
+)
+
+from libapps_browser import (
+    TIMER,
+    ServerBusy,
+    logged_in_storage_state,
+    new_context,
+    wait_for_save,
+)
+from libapps_trace import TRACER, TracedPage
+from libguides_api import LibGuidesAPI
+from rate_limiter import shared_limiter
+
+SAVE_PATTERN = re.compile(config("LIBAPPS_GUIDE_LAYOUT_SAVE_PATTERN", default=r"/libguides/\w+_process\.php"))
+
+RULES = {
+    "update": [
+        ("System Default - Tab Layout", "Caltech Library - Guides - Tab Layout"),
+        ("Inherit Layout From System / Group Settings", "Caltech Library - Guides - Tab Layout"),
+        ("System Default - Side-Nav Layout", "Caltech Library - Guides - Side-Nav Layout"),
+        ("Caltech Library - Guides - *", None),
+    ],
+    "revert": [
+        ("Caltech Library - Guides - Tab Layout", "Inherit Layout From System / Group Settings"),
+        ("Caltech Library - Guides - Side-Nav Layout", "System Default - Side-Nav Layout"),
+        ("Inherit Layout From System / Group Settings", None),
+        ("System Default - *", None),
+    ],
+}
+
+
+def load_rules(rules):
+    """Built-in rules by name, or rules read from a CSV mapping table."""
+    if rules in RULES:
+        return RULES[rules]
+    with open(rules, newline="") as f:
+        return [(row["from"], row["to"] or None) for row in csv.DictReader(f)]
+
+
+class LayoutRules:
+    def __init__(self, rules):
+        self.rules = rules
+
+    def target(self, layout):
+        """(matched, target): the first matching rule's target; None for a final layout."""
+        for pattern, target in self.rules:
+            if fnmatch.fnmatchcase(layout, pattern):
+                return True, target
+        return False, None
+
+    def is_final(self, layout):
+        matched, target = self.target(layout)
+        return matched and target is None
+
+
+class LayoutCache:
+    """Confirmed layout of each guide, saved as JSON after every change."""
+
+    def __init__(self, path=None):
+        self.path = Path(path or config("LIBAPPS_GUIDE_LAYOUT_CACHE", default="_cache/guide_layouts.json"))
+        self.lock = threading.Lock()
+        self.layouts = {}
+        if self.path.exists():
+            with open(self.path) as f:
+                self.layouts = json.load(f)
+
+    def get(self, guide_id):
+        return (self.layouts.get(str(guide_id)) or {}).get("layout")
+
+    def confirm(self, guide_id, layout):
+        with self.lock:
+            self.layouts[str(guide_id)] = {
+                "layout": layout,
+                "confirmed_at": datetime.datetime.now().isoformat(timespec="seconds"),
+            }
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            partial_path = self.path.with_suffix(".partial")
+            with open(partial_path, "w") as f:
+                json.dump(self.layouts, f, indent=1)
+            partial_path.replace(self.path)
+
+
+def read_layout(page):
+    return page.locator("#select2-chosen-1").text_content() or ""
+
+
+def migrate_guide(page, guide, rules, cache, dry_run):
+    """Read the guide's layout once and change it according to `rules`; return a status line."""
+    with TIMER.step("navigate"):
+        page.goto(f"/libguides/admin_c.php?g={guide['id']}")
+    with TIMER.step("open"):
+        page.get_by_title("Guide Layout").click()
+        page.get_by_role("link", name="Guide Navigation Layout").click()
+        layout = read_layout(page)
+    matched, target = rules.target(layout)
+    if not matched or target is None or dry_run:
+        page.get_by_role("button", name="Cancel").click()
+        if target is None and matched:
+            cache.confirm(guide["id"], layout)
+            return f"{layout} ✨"
+        if not matched:
+            return f"{layout} ❓"
+        return f"{layout} ➡️ {target} 🐞"
+    page.locator("#select2-chosen-1").click()
+    page.get_by_role("option", name=target).click()
+    with TIMER.step("save"):
+        wait_for_save(page, page.get_by_role("button", name="Save").click, pattern=SAVE_PATTERN)
+    # NOTE cache the layout the page shows after saving, not the one requested
+    saved = read_layout(page)
+    if saved != target:
+        return f"{layout} ➡️ {target} ❌ reads {saved!r} after saving"
+    cache.confirm(guide["id"], saved)
+    return f"{layout} ➡️ {target} ✨"
+
+
+def migrate(guides, rules, workers=1, refresh=False, dry_run=False):
+    """Apply layout `rules` to `guides` with `workers` browser pages at once."""
+    rules = LayoutRules(rules)
+    cache = LayoutCache()
+    pending = queue.Queue()
+    skipped = 0
+    for guide in guides:
+        cached = cache.get(guide["id"])
+        if not refresh and cached and rules.is_final(cached):
+            skipped += 1
+            continue
+        pending.put(guide)
+    print(f"📚 {pending.qsize()} guides to check; {skipped} already confirmed in {cache.path}")
+    if pending.empty():
+        return
+    TRACER.start(Path("_outputs").joinpath(f"spans-layouts-{datetime.datetime.now().isoformat(timespec='seconds').replace(':', '')}.jsonl"))
+    with sync_playwright() as playwright:
+        browser = playwright.firefox.launch()
+        try:
+            storage_state = logged_in_storage_state(browser)
+        finally:
+            browser.close()
+    print_lock = threading.Lock()
+    limiter = shared_limiter()
+
+    def worker():
+        with sync_playwright() as playwright:
+            browser = playwright.firefox.launch()
+            try:
+                context = new_context(browser, video_dir="_outputs", storage_state=storage_state)
+                page = TracedPage(context.new_page())
+                while True:
+                    try:
+                        guide = pending.get_nowait()
+                    except queue.Empty:
+                        break
+                    TRACER.start_item(guide["id"])
+                    limiter.acquire()
+                    try:
+                        status = migrate_guide(page, guide, rules, cache, dry_run)
+                        limiter.success()
+                    except PlaywrightError as e:
+                        status = f"❌ {str(e).strip().splitlines()[0] if str(e).strip() else type(e).__name__}"
+                        if isinstance(e, (PlaywrightTimeoutError, ServerBusy)):
+                            limiter.throttled(status)
+                        page.close()
+                        page = TracedPage(context.new_page())
+                    except Exception as e:
+                        # NOTE report unexpected errors and carry on with the next guide
+                        status = f"❌ {type(e).__name__}: {e}\n{traceback.format_exc()}"
+                        page.close()
+                        page = TracedPage(context.new_page())
+                    with print_lock:
+                        print(guide["name"])
+                        print(f"/libguides/admin_c.php?g={guide['id']}", status)
+                context.close()
+            finally:
+                browser.close()
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(min(workers, pending.qsize()))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    TIMER.summary()
+    TRACER.summary()
+    print(f"🚦 rate {limiter.status()}")
+
+
+def main(
+    groups: "comma-delimited list of group IDs",  # type: ignore
+    rules: ("built-in rules (update or revert) or a CSV with from,to columns", "option", "r") = "update",  # type: ignore
+    workers: ("number of browser pages", "option", "w", int) = 1,  # type: ignore
+    refresh: ("check guides even if cached in a final layout", "flag", "f") = False,  # type: ignore
+    dry_run: ("report changes without saving", "flag", "d") = False,  # type: ignore
+):
+    migrate(LibGuidesAPI().guides(group_ids=groups, fields=["id", "name"]), load_rules(rules), workers, refresh, dry_run)
+
+
+if __name__ == "__main__":
+    # fmt: off
+    import plac; plac.call(main)
@@ -0,0 +1,725 @@
+# file: libapps_browser.py
+
+# Shared Playwright helpers for the LibApps admin scripts: logging in, the
+# asset edit steps, and an executor that applies a list of asset edits with
+# several browser workers at once.
+#
+# The executor logs in once and starts each worker in its own thread with its
+# own browser and a context that reuses the authenticated storage state.
+# Edits are spread over per-worker queues, the adaptive rate limiter shared
+# with API requests (see `rate_limiter.py`) paces edit starts across all
+# workers and slows down on timeouts and 429/5xx save responses, and every
+# result is appended to a JSON-lines log in the output directory.
+#
+# The authenticated storage state is saved to a file only readable by the
+# current user and reused on later runs. It is checked with one request
+# that does not load a page, and the login form is only filled in again when
+# that check fails.
+#
+# Instead of waiting for `networkidle` (which always adds a quiet period and
+# stalls on background requests), steps wait for the specific DataTables or
+# save response they trigger, with an explicit timeout. Each step's latency is
+# recorded by `TIMER` and summarized at the end of a run.
+#
+# Browser contexts abort requests for resource types and hosts the automation
+# never needs (images, fonts, media, analytics, and third-party widgets), except
+# for hosts on an allowlist.
+#
+# Screenshots follow an artifact policy: `none`, `on-failure` (the default;
+# the last few screenshots are kept in memory and only written when an edit
+# fails), `sampled` (as on-failure, plus every Nth edit is written), or `all`.
+# Video recording is off unless enabled. With `LIBAPPS_TRACE_FAILURES`, a
+# Playwright trace is recorded for each edit attempt and only written for
+# edits that fail.
+#
+# Every page action is traced (see `libapps_trace.py`): spans are written to a
+# `spans-*.jsonl` file next to the results, and the p50/p95 duration of each
+# action is summarized at the end of a run.
+#
+# The results log doubles as a run journal keyed by asset ID (or by the URL a
+# link is found by): every edit is recorded as planned, then as saved,
+# cancelled, skipped, or failed. Failed edits are retried with backoff, and
+# `resume=True` continues the latest journal, leaving out edits it already
+# saved or skipped.
+
+# Required values in `settings.ini` include:
+#
+# - LIBAPPS_BASE_URL
+# - LIBAPPS_USERNAME
+# - LIBAPPS_PASSWORD
+#
+# Optional values in `settings.ini` include:
+#
+# - LIBAPPS_SESSION_FILE [default: _cache/libapps_session.json]
+# - LIBAPPS_RESPONSE_TIMEOUT [seconds to wait for a table or save response; default: 30]
+# - LIBAPPS_BLOCK_RESOURCES [default: True]
+# - LIBAPPS_BLOCK_RESOURCE_TYPES [comma-separated; default: image,font,media]
+# - LIBAPPS_BLOCK_HOSTS [comma-separated; default: common analytics and widget hosts]
+# - LIBAPPS_ALLOW_HOSTS [comma-separated hosts that are never blocked]
+# - LIBAPPS_ARTIFACTS [none, on-failure, sampled, or all; default: on-failure]
+# - LIBAPPS_ARTIFACT_SAMPLE_EVERY [with `sampled`; default: 100]
+# - LIBAPPS_SCREENSHOT_BUFFER [screenshots kept in memory per worker; default: 5]
+# - LIBAPPS_RECORD_VIDEO [default: False]
+# - LIBAPPS_TRACE_FAILURES [write Playwright traces of failed edits; default: False]
+# - LIBAPPS_EDIT_RETRIES [retries per failed edit; default: 2]
+# - LIBAPPS_RETRY_BACKOFF [seconds before the first retry, doubled after each; default: 5]
+# - LIBAPPS_TABLE_RESPONSE_PATTERN [regex for DataTables request paths; default: /libguides/(assets|az)(_process)?\.php]
+
+import datetime
+import json
+import os
+import queue
+import re
+import statistics
+import threading
+import time
+import traceback
+import urllib.parse
+
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from pathlib import Path
+
+import requests
+
+from decouple import config  # pypi python-decouple
+
+from playwright.sync_api import (
+    sync_playwright,
+    Error as PlaywrightError,
+    TimeoutError as PlaywrightTimeoutError,
+)
+
+# NOTE AssetEdit lives in edit_planner.py so edits can be planned without
+# loading Playwright; it is imported here for the edit scripts
+from edit_planner import AssetEdit  # noqa: F401
+from libapps_trace import TRACER, TracedPage, expect
+from rate_limiter import AdaptiveRateLimiter, shared_limiter
+
+
+class EditSkipped(Exception):
+    """Raised by an edit function when the asset should be left alone."""
+
+
+class ServerBusy(PlaywrightError):
+    """Raised when LibApps answers a save with 429 or a 5xx status."""
+
+
+RESPONSE_TIMEOUT = config("LIBAPPS_RESPONSE_TIMEOUT", default=30, cast=float) * 1000
+TABLE_RESPONSE_PATTERN = re.compile(
+    config("LIBAPPS_TABLE_RESPONSE_PATTERN", default=r"/libguides/(assets|az)(_process)?\.php")
+)
+
+
+BLOCKED_HOSTS = (
+    "google-analytics.com",
+    "googletagmanager.com",
+    "doubleclick.net",
+    "hotjar.com",
+    "newrelic.com",
+    "nr-data.net",
+    "fonts.googleapis.com",
+    "fonts.gstatic.com",
+    "addthis.com",
+    "sharethis.com",
+    "facebook.net",
+    "twitter.com",
+    "youtube.com",
+    "vimeo.com",
+)
+
+
+def setting_list(name, default=""):
+    return [v.strip().lower() for v in config(name, default=default).split(",") if v.strip()]
+
+
+class ResourceBlocker:
+    """Route handler that aborts requests the automation does not need."""
+
+    def __init__(self, resource_types=None, hosts=None, allow_hosts=None):
+        self.resource_types = set(
+            resource_types if resource_types is not None else setting_list("LIBAPPS_BLOCK_RESOURCE_TYPES", "image,font,media")
+        )
+        self.hosts = tuple(hosts if hosts is not None else setting_list("LIBAPPS_BLOCK_HOSTS", ",".join(BLOCKED_HOSTS)))
+        self.allow_hosts = tuple(allow_hosts if allow_hosts is not None else setting_list("LIBAPPS_ALLOW_HOSTS"))
+        self.blocked = 0
+
+    @staticmethod
+    def host_matches(host, domains):
+        return any(host == d or host.endswith("." + d) for d in domains)
+
+    def should_block(self, request):
+        host = (urllib.parse.urlsplit(request.url).hostname or "").lower()
+        if not host or self.host_matches(host, self.allow_hosts):
+            return False
+        return request.resource_type in self.resource_types or self.host_matches(host, self.hosts)
+
+    def __call__(self, route):
+        if self.should_block(route.request):
+            self.blocked += 1
+            route.abort("blockedbyclient")
+        else:
+            route.continue_()
+
+
+def new_context(browser, video_dir=None, **kwargs):
+    """Create a LibApps browser context with heavy resources blocked.
+
+    Video is recorded into `video_dir` only when `LIBAPPS_RECORD_VIDEO` is set.
+    """
+    if video_dir and config("LIBAPPS_RECORD_VIDEO", default=False, cast=bool):
+        kwargs["record_video_dir"] = str(video_dir)
+    context = browser.new_context(base_url=config("LIBAPPS_BASE_URL"), **kwargs)
+    if config("LIBAPPS_BLOCK_RESOURCES", default=True, cast=bool):
+        context.route("**/*", ResourceBlocker())
+    return context
+
+
+ARTIFACT_POLICIES = ("none", "on-failure", "sampled", "all")
+
+
+class Artifacts:
+    """Take screenshots for one worker according to the artifact policy."""
+
+    def __init__(self, output_dir, policy=None, sample_every=None, buffer_size=None, context=None):
+        self.output_dir = Path(output_dir)
+        self.policy = policy or config("LIBAPPS_ARTIFACTS", default="on-failure")
+        if self.policy not in ARTIFACT_POLICIES:
+            raise ValueError(f"LIBAPPS_ARTIFACTS must be one of {', '.join(ARTIFACT_POLICIES)}")
+        self.sample_every = sample_every or config("LIBAPPS_ARTIFACT_SAMPLE_EVERY", default=100, cast=int)
+        self.buffer = deque(maxlen=buffer_size or config("LIBAPPS_SCREENSHOT_BUFFER", default=5, cast=int))
+        self.count = 0
+        self.write_now = False
+        # NOTE a trace chunk is recorded per item and only saved when it fails
+        self.tracing = None
+        if context is not None and config("LIBAPPS_TRACE_FAILURES", default=False, cast=bool):
+            self.tracing = context.tracing
+            self.tracing.start(screenshots=True, snapshots=True)
+        self.chunk_open = False
+
+    def start(self, attempt=1):
+        """Start an attempt at an item; earlier buffered screenshots and trace chunks are dropped.
+
+        Items are counted on their first attempt, so retries do not shift the sampling.
+        """
+        if attempt == 1:
+            self.count += 1
+            self.write_now = self.policy == "all" or (
+                self.policy == "sampled" and (self.count - 1) % self.sample_every == 0
+            )
+        self.buffer.clear()
+        if self.tracing:
+            if self.chunk_open:
+                self.tracing.stop_chunk()
+            self.tracing.start_chunk()
+            self.chunk_open = True
+
+    def screenshot(self, page, name):
+        if self.policy == "none":
+            return
+        if self.write_now:
+            page.screenshot(path=self.output_dir.joinpath(f"{name}.png").as_posix())
+        else:
+            self.buffer.append((name, page.screenshot()))
+
+    def failed(self, page, name):
+        """Write the buffered screenshots, one of the failed state, and the trace."""
+        if self.tracing and self.chunk_open:
+            self.tracing.stop_chunk(path=self.output_dir.joinpath(f"{name}-trace.zip").as_posix())
+            self.chunk_open = False
+        if self.policy == "none":
+            return
+        for buffered_name, image in self.buffer:
+            self.output_dir.joinpath(f"{buffered_name}.png").write_bytes(image)
+        self.buffer.clear()
+        try:
+            page.screenshot(path=self.output_dir.joinpath(f"{name}-failed.png").as_posix())
+        except PlaywrightError:
+            pass
+
+
+class StepTimer:
+    """Collect the latency of named steps across worker threads."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.timings = defaultdict(list)
+        self.local = threading.local()
+
+    def start_item(self):
+        """Start collecting step timings for the current thread's next item."""
+        self.local.steps = {}
+        return self.local.steps
+
+    @contextmanager
+    def step(self, name):
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            seconds = time.monotonic() - started
+            with self.lock:
+                self.timings[name].append(seconds)
+            steps = getattr(self.local, "steps", None)
+            if steps is not None:
+                steps[name] = round(steps.get(name, 0) + seconds, 3)
+
+    def summary(self):
+        with self.lock:
+            timings = {k: list(v) for k, v in self.timings.items()}
+        for name, seconds in timings.items():
+            print(
+                f"⏱️  {name}: {len(seconds)}× mean {statistics.mean(seconds):.2f}s"
+                f" median {statistics.median(seconds):.2f}s max {max(seconds):.2f}s"
+            )
+
+
+TIMER = StepTimer()
+
+
+def is_table_response(response):
+    request = response.request
+    return request.resource_type in ("xhr", "fetch") and bool(
+        TABLE_RESPONSE_PATTERN.search(urllib.parse.urlsplit(response.url).path)
+    )
+
+
+def save_response_matcher(pattern=None):
+    """Predicate for the XHR POST response that saves a form, to a path matching `pattern` if given."""
+
+    def is_save_response(response):
+        request = response.request
+        return (
+            request.resource_type in ("xhr", "fetch")
+            and request.method == "POST"
+            and (pattern is None or bool(pattern.search(urllib.parse.urlsplit(response.url).path)))
+        )
+
+    return is_save_response
+
+
+is_save_response = save_response_matcher()
+
+
+def wait_for_table(page, action, timeout=None):
+    """Run `action` and wait for the DataTables response it triggers."""
+    with page.expect_response(is_table_response, timeout=timeout or RESPONSE_TIMEOUT) as response_info:
+        action()
+    return response_info.value
+
+
+def wait_for_save(page, action, timeout=None, pattern=None):
+    """Run `action` and wait for the POST response that saves the form; with `pattern`, only a POST to a matching path counts."""
+    predicate = save_response_matcher(pattern) if pattern else is_save_response
+    with page.expect_response(predicate, timeout=timeout or RESPONSE_TIMEOUT) as response_info:
+        action()
+    response = response_info.value
+    if response.status == 429 or response.status >= 500:
+        raise ServerBusy(f"save returned HTTP {response.status}")
+    if not response.ok:
+        raise PlaywrightError(f"save returned HTTP {response.status}")
+    return response
+
+
+def login(page):
+    with TIMER.step("login"):
+        page.goto("/libapps/login.php")
+        page.fill("#s-libapps-email", config("LIBAPPS_USERNAME"))
+        page.fill("#s-libapps-password", config("LIBAPPS_PASSWORD"))
+        page.click("#s-libapps-login-button")
+        page.wait_for_url(lambda url: "login.php" not in url, timeout=RESPONSE_TIMEOUT)
+
+
+def session_path():
+    return Path(config("LIBAPPS_SESSION_FILE", default="_cache/libapps_session.json"))
+
+
+def is_cookie_for_host(cookie, host):
+    """Whether the browser sends `cookie` to `host`."""
+    domain = cookie.get("domain", "").lstrip(".").lower()
+    return host == domain or host.endswith(f".{domain}")
+
+
+def session_is_valid(context):
+    """Check a logged-in context without rendering a page.
+
+    Expired LibApps cookies are caught locally (cookies of other hosts, e.g.
+    analytics, are ignored); otherwise one request for the assets page must
+    return it rather than redirect to the login form.
+    """
+    now = time.time()
+    host = urllib.parse.urlsplit(config("LIBAPPS_BASE_URL")).hostname or ""
+    cookies = [c for c in context.cookies() if is_cookie_for_host(c, host)]
+    if not cookies or any(0 < c.get("expires", -1) < now for c in cookies):
+        return False
+    try:
+        response = context.request.get("/libguides/assets.php", max_redirects=0)
+    except PlaywrightError:
+        return False
+    return response.status == 200 and "login.php" not in response.url
+
+
+def save_session(storage_state):
+    path = session_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # NOTE the session cookies are credentials; create the file as 0600
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w") as f:
+        json.dump(storage_state, f)
+    os.chmod(path, 0o600)
+
+
+def logged_in_storage_state(browser, refresh=False):
+    """Return a valid storage state, reusing the saved session when possible."""
+    path = session_path()
+    if path.exists() and not refresh:
+        context = new_context(browser, storage_state=path.as_posix())
+        try:
+            if session_is_valid(context):
+                return context.storage_state()
+        finally:
+            context.close()
+        print("🔑 saved LibApps session expired; logging in again")
+    context = new_context(browser)
+    try:
+        login(TracedPage(context.new_page()))
+        storage_state = context.storage_state()
+    finally:
+        context.close()
+    save_session(storage_state)
+    return storage_state
+
+
+def new_logged_in_page(browser, **kwargs):
+    """Open a page in a new context that is logged in to LibApps."""
+    context = new_context(browser, storage_state=logged_in_storage_state(browser), **kwargs)
+    return TracedPage(context.new_page())
+
+
+def ensure_page(page, path):
+    """Navigate to `path` unless the page is already showing it."""
+    if urllib.parse.urlsplit(page.url).path != path:
+        page.goto(path)
+
+
+def fresh_page(page, context):
+    """Blank `page` for the next attempt, or a new page if it cannot be reused."""
+    try:
+        page.goto("about:blank")
+        return page
+    except PlaywrightError:
+        return TracedPage(context.new_page())
+
+
+def edit_key(edit):
+    """Journal key of an edit: its asset ID, or the URL it is found by."""
+    return str(edit.asset_id) if edit.asset_id else f"url:{edit.find_url}"
+
+
+def describe_edit(edit):
+    changes = []
+    if edit.replace_url:
+        changes.append(f"URL ➡️ {edit.replace_url}")
+    if edit.toggle_proxy:
+        changes.append(f"“Use Proxy?” ➡️ {edit.toggle_proxy}")
+    if edit.note:
+        changes.append(f"[{edit.note}]")
+    return " ".join(changes)
+
+
+def edit_asset_by_id(page, edit, dry_run, artifacts):
+    """Filter the assets (or A-Z databases) table to one ID and apply the edit in its modal.
+
+    The page and its filter are reused from the previous edit: typing the new
+    ID replaces the old filter in one table reload, and the row with exactly
+    this ID must be the only match before its edit dialog is opened.
+    """
+    with TIMER.step("navigate"):
+        if edit.asset_type == "Database":
+            ensure_page(page, "/libguides/az.php")
+        else:
+            ensure_page(page, "/libguides/assets.php")
+    with TIMER.step("filter"):
+        page.get_by_role("textbox", name="ID").fill(str(edit.asset_id))
+        wait_for_table(page, lambda: page.keyboard.up("ArrowRight"))
+        # NOTE the status text may still describe the previous single-ID filter,
+        # so also wait for the row of this ID before trusting the count
+        row = page.get_by_role("row").filter(
+            has=page.get_by_role("cell", name=str(edit.asset_id), exact=True)
+        )
+        expect(row).to_have_count(1)
+        expect(page.get_by_role("status")).to_contain_text("Showing 1 to 1 of 1 entries")
+    artifacts.screenshot(page, f"{edit.asset_id}-filtered")
+    with TIMER.step("open"):
+        row.get_by_title("Edit Item").click()
+        page.locator("#form-group-enable_proxy").wait_for(timeout=RESPONSE_TIMEOUT)
+    artifacts.screenshot(page, f"{edit.asset_id}-pre-edit")
+    if edit.replace_url:
+        if "Link" in edit.asset_type:
+            page.get_by_label("Link URL").fill(edit.replace_url)
+        elif "Book" in edit.asset_type:
+            page.get_by_role("textbox", name="URL", exact=True).fill(edit.replace_url)
+    # NOTE clicking the label rather than the input works
+    if edit.toggle_proxy == "Yes":
+        page.locator("#label-enable_proxy_1").click()
+    elif edit.toggle_proxy == "No":
+        page.locator("#label-enable_proxy_0").click()
+    artifacts.screenshot(page, f"{edit.asset_id}-pre-save")
+    if dry_run:
+        page.get_by_role("button", name="Cancel").click()
+        return "cancelled"
+    with TIMER.step("save"):
+        wait_for_save(page, page.get_by_role("button", name="Save").click)
+    return "saved"
+
+
+class EditExecutor:
+    """Apply asset edits concurrently with `workers` logged-in browser contexts.
+
+    `apply(page, edit, dry_run, artifacts)` performs one edit on a worker's
+    page and returns a status string; it may raise `EditSkipped`.
+
+    With `backend="http"`, edits that have an asset ID are first replayed as
+    form posts (see `libapps_http.py`); those that fail fall back to `apply`.
+
+    With `resume=True`, results are appended to the latest journal in
+    `output_dir`, and edits it records as done with the same changes are left out.
+    Each script passes its own `output_dir` so it never resumes another's journal.
+    """
+
+    def __init__(self, apply=edit_asset_by_id, workers=1, rate=None, output_dir="_outputs", dry_run=False, backend="browser", resume=False):
+        self.apply = apply
+        self.backend = backend
+        self.workers = max(1, workers)
+        # NOTE edits share the adaptive limiter with API requests unless given their own rate
+        self.rate_limiter = AdaptiveRateLimiter(rate=rate) if rate else shared_limiter()
+        self.output_dir = Path(output_dir)
+        # NOTE fail before logging in if LIBAPPS_ARTIFACTS is not a known policy
+        Artifacts(self.output_dir)
+        self.dry_run = dry_run
+        self.results = []
+        self.results_lock = threading.Lock()
+        self.retries = config("LIBAPPS_EDIT_RETRIES", default=2, cast=int)
+        self.backoff = config("LIBAPPS_RETRY_BACKOFF", default=5, cast=float)
+        journals = sorted(self.output_dir.glob("edits-*.jsonl")) if resume else []
+        if journals:
+            self.results_path = journals[-1]
+        else:
+            self.results_path = self.output_dir.joinpath(
+                f"edits-{datetime.datetime.now().isoformat(timespec='seconds').replace(':', '')}.jsonl"
+            )
+        self.resume = resume
+
+    def done_statuses(self):
+        # NOTE a dry run's cancelled edits still need to be saved by a real run
+        return {"saved", "skipped", "cancelled"} if self.dry_run else {"saved", "skipped"}
+
+    def load_journal(self):
+        """Latest journal entry for each edit key in the journal being resumed."""
+        entries = {}
+        if self.results_path.exists():
+            with open(self.results_path) as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        entries[entry["key"]] = entry
+        return entries
+
+    def journal(self, entry):
+        with self.results_lock:
+            with open(self.results_path, "a") as f:
+                f.write(json.dumps(entry) + "\n")
+
+    def run(self, edits):
+        """Apply `edits` and return one result dict per edit."""
+        edits = list(edits)
+        if not edits:
+            return []
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        if self.resume:
+            entries = self.load_journal()
+            done = self.done_statuses()
+            remaining = [
+                e for e in edits
+                if not (
+                    entries.get(edit_key(e), {}).get("status") in done
+                    # NOTE compare as JSON so IDs read from CSV and the journal agree
+                    and entries[edit_key(e)]["edit"] == json.loads(json.dumps(e._asdict()))
+                )
+            ]
+            print(f"\n⏭️  resuming {self.results_path}: {len(edits) - len(remaining)} edits already done")
+            edits = remaining
+            if not edits:
+                return []
+        for edit in edits:
+            self.journal({"key": edit_key(edit), "status": "planned", "edit": edit._asdict()})
+        if self.dry_run:
+            print("\n🐞 DRY RUN: no changes will be saved")
+        TRACER.start(self.results_path.with_name(self.results_path.name.replace("edits-", "spans-", 1)))
+        storage_state = self.login()
+        if self.backend == "http":
+            from libapps_http import HTTPEditor
+
+            self.http_editor = HTTPEditor(storage_state, pool_size=self.workers, limiter=self.rate_limiter)
+            self.fallback = []
+            self.run_workers([e for e in edits if e.asset_id], self.http_worker, storage_state)
+            edits = [e for e in edits if not e.asset_id] + self.fallback
+            if edits:
+                print(f"\n🌐 {len(edits)} edits fall back to the browser")
+        self.run_workers(edits, self.worker, storage_state)
+        if self.dry_run:
+            print("\n🐞 DRY RUN: no changes were saved")
+        counts = {}
+        for result in self.results:
+            counts[result["status"]] = counts.get(result["status"], 0) + 1
+        print(f"\n📋 {', '.join(f'{v} {k}' for k, v in sorted(counts.items())) or 'no edits'}; results in {self.results_path}")
+        TIMER.summary()
+        TRACER.summary()
+        print(f"🚦 rate {self.rate_limiter.status()}\n")
+        return self.results
+
+    def run_workers(self, edits, target, storage_state):
+        if not edits:
+            return
+        # NOTE databases are edited on az.php and other assets on assets.php;
+        # grouping them means each worker navigates between the two at most once
+        edits = sorted(edits, key=lambda e: e.asset_type == "Database")
+        queues = [queue.Queue() for _ in range(min(self.workers, len(edits)))]
+        for i, edit in enumerate(edits):
+            queues[i % len(queues)].put(edit)
+        threads = [
+            threading.Thread(target=target, args=(number, edit_queue, storage_state), daemon=True)
+            for number, edit_queue in enumerate(queues)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def http_worker(self, number, edit_queue, storage_state):
+        from libapps_http import HTTPEditFailed
+
+        while True:
+            try:
+                edit = edit_queue.get_nowait()
+            except queue.Empty:
+                break
+            started = time.monotonic()
+            steps = TIMER.start_item()
+            try:
+                with TIMER.step("http edit"):
+                    status = self.http_editor.apply(edit, self.dry_run)
+            except (HTTPEditFailed, requests.RequestException, ValueError) as e:
+                with self.results_lock:
+                    self.fallback.append(edit)
+                print("🌐", edit.asset_id, "HTTP edit failed:", e)
+                continue
+            except Exception as e:
+                self.record(
+                    f"http-{number}", edit, "failed", f"{type(e).__name__}: {e}",
+                    time.monotonic() - started, steps, trace=traceback.format_exc(),
+                )
+                continue
+            self.record(f"http-{number}", edit, status, "", time.monotonic() - started, steps)
+
+    def login(self):
+        # NOTE Playwright objects belong to the thread that created them, so
+        # each worker starts its own and reuses the storage state from here
+        with sync_playwright() as playwright:
+            browser = playwright.firefox.launch()
+            try:
+                return logged_in_storage_state(browser)
+            finally:
+                browser.close()
+
+    def worker(self, number, edit_queue, storage_state):
+        edit = None
+        try:
+            with sync_playwright() as playwright:
+                browser = playwright.firefox.launch()
+                try:
+                    context = new_context(browser, video_dir=self.output_dir, storage_state=storage_state)
+                    page = TracedPage(context.new_page())
+                    artifacts = Artifacts(self.output_dir, context=context)
+                    while True:
+                        try:
+                            edit = edit_queue.get_nowait()
+                        except queue.Empty:
+                            break
+                        started = time.monotonic()
+                        steps = TIMER.start_item()
+                        TRACER.start_item(edit.asset_id or edit.find_url)
+                        for attempt in range(1, self.retries + 2):
+                            self.rate_limiter.wait()
+                            artifacts.start(attempt)
+                            error = ""
+                            trace = ""
+                            try:
+                                status = self.apply(page, edit, self.dry_run, artifacts)
+                                self.rate_limiter.success()
+                                break
+                            except EditSkipped as e:
+                                status = "skipped"
+                                error = str(e)
+                                break
+                            except (PlaywrightError, AssertionError) as e:
+                                status = "failed"
+                                error = str(e).strip().splitlines()[0] if str(e).strip() else type(e).__name__
+                                if isinstance(e, (PlaywrightTimeoutError, ServerBusy)):
+                                    self.rate_limiter.throttled(error)
+                                if attempt > self.retries:
+                                    artifacts.failed(page, edit.asset_id or f"worker{number}-{artifacts.count}")
+                                # NOTE start the next attempt from a fresh page
+                                page = fresh_page(page, context)
+                            except Exception as e:
+                                # NOTE any other error is a bug rather than a flaky page, so
+                                # it is recorded without retrying and the worker carries on
+                                status = "failed"
+                                error = f"{type(e).__name__}: {e}"
+                                trace = traceback.format_exc()
+                                page = fresh_page(page, context)
+                                break
+                            if attempt <= self.retries:
+                                delay = self.backoff * 2 ** (attempt - 1)
+                                print("🔁", edit.asset_id or edit.find_url, f"retry {attempt} in {delay:g}s:", error)
+                                time.sleep(delay)
+                        self.record(number, edit, status, error, time.monotonic() - started, steps, attempt, trace)
+                        edit = None
+                    context.close()
+                finally:
+                    browser.close()
+        except Exception as e:
+            # NOTE without a browser the worker cannot go on; the edit in hand
+            # and the rest of its queue are journaled as failed, not dropped
+            error = f"{type(e).__name__}: {e}"
+            trace = traceback.format_exc()
+            print(f"💥 worker {number} stopped:", error)
+            remaining = [edit] if edit is not None else []
+            while True:
+                try:
+                    remaining.append(edit_queue.get_nowait())
+                except queue.Empty:
+                    break
+            for edit in remaining:
+                self.record(number, edit, "failed", error, 0, trace=trace)
+
+    def record(self, worker, edit, status, error, seconds, steps=None, attempts=1, trace=""):
+        result = {
+            "key": edit_key(edit),
+            "asset_id": edit.asset_id,
+            "find_url": edit.find_url,
+            "worker": worker,
+            "status": status,
+            "error": error,
+            "seconds": round(seconds, 3),
+            "steps": steps or {},
+            "attempts": attempts,
+            "edit": edit._asdict(),
+        }
+        if trace:
+            result["traceback"] = trace
+        icon = {"saved": "☑️ ", "cancelled": "🐞", "skipped": "⛔️", "failed": "❌"}.get(status, "❓")
+        self.journal(result)
+        with self.results_lock:
+            self.results.append(result)
+            print(icon, edit.asset_id or edit.find_url, status, error or describe_edit(edit))
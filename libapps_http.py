@@ -0,0 +1,182 @@
+# file: libapps_http.py
+
+# Browserless backend for asset edits. The edit modal in the LibApps admin is
+# an HTML form that is submitted with one POST, so instead of driving the UI
+# this backend fetches the edit form with the logged-in session cookies,
+# changes the `url` and `enable_proxy` fields, and posts the form back with a
+# pooled `requests.Session`, paced by the shared rate limiter (see
+# `rate_limiter.py`). Each saved edit is then read back through the LibGuides
+# API to confirm it took effect.
+#
+# Any edit that cannot be replayed (unexpected form, login redirect, error
+# response, or a read-back that does not match) raises `HTTPEditFailed`, and
+# `EditExecutor` retries it with the Playwright backend.
+
+# Optional values in `settings.ini` include:
+#
+# - LIBAPPS_ASSET_FORM_PATH [default: /libguides/assets.php?action=edit&asset_id={asset_id}]
+# - LIBAPPS_DATABASE_FORM_PATH [default: /libguides/az.php?action=edit&asset_id={asset_id}]
+
+import html.parser
+import urllib.parse
+
+import requests
+
+from decouple import config  # pypi python-decouple
+from requests.adapters import HTTPAdapter
+
+from libguides_api import LibGuidesAPI, RETRY_STATUSES
+from rate_limiter import shared_limiter
+
+
+class HTTPEditFailed(Exception):
+    """Raised when an edit could not be replayed or verified over HTTP."""
+
+
+class FormParser(html.parser.HTMLParser):
+    """Collect the action and submitted field values of the edit form."""
+
+    def __init__(self):
+        super().__init__()
+        self.forms = []
+        self.form = None
+        self.select = None
+        self.textarea = None
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == "form":
+            self.form = {"action": attrs.get("action") or "", "method": (attrs.get("method") or "get").lower(), "fields": {}}
+            self.forms.append(self.form)
+        if self.form is None or attrs.get("disabled") is not None:
+            return
+        name = attrs.get("name")
+        if tag == "input" and name:
+            input_type = (attrs.get("type") or "text").lower()
+            if input_type in ("submit", "button", "image", "reset", "file"):
+                return
+            if input_type in ("checkbox", "radio"):
+                if "checked" in attrs:
+                    self.form["fields"][name] = attrs.get("value", "on")
+                else:
+                    self.form["fields"].setdefault(name, None)
+                return
+            self.form["fields"][name] = attrs.get("value") or ""
+        elif tag == "select" and name:
+            self.select = name
+            self.form["fields"].setdefault(name, None)
+        elif tag == "option" and self.select:
+            if "selected" in attrs or self.form["fields"][self.select] is None:
+                self.form["fields"][self.select] = attrs.get("value") or ""
+        elif tag == "textarea" and name:
+            self.textarea = name
+            self.form["fields"][name] = ""
+
+    def handle_endtag(self, tag):
+        if tag == "form":
+            self.form = None
+        elif tag == "select":
+            self.select = None
+        elif tag == "textarea":
+            self.textarea = None
+
+    def handle_data(self, data):
+        if self.form is not None and self.textarea:
+            self.form["fields"][self.textarea] += data
+
+
+def cookie_jar(storage_state):
+    """Convert a Playwright storage state into a requests cookie jar."""
+    jar = requests.cookies.RequestsCookieJar()
+    for cookie in storage_state.get("cookies", []):
+        jar.set(
+            cookie["name"],
+            cookie["value"],
+            domain=cookie.get("domain", ""),
+            path=cookie.get("path", "/"),
+            secure=cookie.get("secure", False),
+        )
+    return jar
+
+
+class HTTPEditor:
+    def __init__(self, storage_state, api=None, base_url=None, timeout=30, pool_size=8, limiter=None):
+        self.base_url = base_url or config("LIBAPPS_BASE_URL")
+        self.limiter = limiter or shared_limiter()
+        self.api = api or LibGuidesAPI(limiter=self.limiter)
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.cookies = cookie_jar(storage_state)
+        adapter = HTTPAdapter(pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def request(self, method, url, **kwargs):
+        """Send one admin request paced by the rate limiter."""
+        self.limiter.acquire()
+        response = self.session.request(method, url, timeout=self.timeout, **kwargs)
+        if response.status_code in RETRY_STATUSES:
+            self.limiter.throttled(f"HTTP {response.status_code} from {urllib.parse.urlsplit(url).path}")
+            raise HTTPEditFailed(f"LibApps returned HTTP {response.status_code}")
+        self.limiter.success()
+        return response
+
+    def form_url(self, edit):
+        if edit.asset_type == "Database":
+            path = config("LIBAPPS_DATABASE_FORM_PATH", default="/libguides/az.php?action=edit&asset_id={asset_id}")
+        else:
+            path = config("LIBAPPS_ASSET_FORM_PATH", default="/libguides/assets.php?action=edit&asset_id={asset_id}")
+        return urllib.parse.urljoin(self.base_url, path.format(asset_id=edit.asset_id))
+
+    def fetch_form(self, edit):
+        response = self.request("GET", self.form_url(edit))
+        if "login.php" in response.url:
+            raise HTTPEditFailed("session redirected to login")
+        if response.status_code != 200:
+            raise HTTPEditFailed(f"edit form returned HTTP {response.status_code}")
+        parser = FormParser()
+        parser.feed(response.text)
+        for form in parser.forms:
+            if "enable_proxy" in form["fields"]:
+                return urllib.parse.urljoin(response.url, form["action"]), form["fields"]
+        raise HTTPEditFailed("edit form not found")
+
+    def apply(self, edit, dry_run):
+        """Post the edit form with the changed fields and verify it; return a status string."""
+        if not edit.asset_id:
+            raise HTTPEditFailed("asset ID required")
+        action, fields = self.fetch_form(edit)
+        if edit.replace_url:
+            if "url" not in fields:
+                raise HTTPEditFailed("edit form has no url field")
+            fields["url"] = edit.replace_url
+        if edit.toggle_proxy:
+            fields["enable_proxy"] = "1" if edit.toggle_proxy == "Yes" else "0"
+        if dry_run:
+            return "cancelled"
+        response = self.request(
+            "POST",
+            action,
+            data={k: v for k, v in fields.items() if v is not None},
+        )
+        if response.status_code != 200 or "login.php" in response.url:
+            raise HTTPEditFailed(f"save returned HTTP {response.status_code}")
+        if response.headers.get("Content-Type", "").startswith("application/json"):
+            result = response.json()
+            if isinstance(result, dict) and (result.get("errcode") or result.get("error")):
+                raise HTTPEditFailed(f"save failed: {result.get('errmsg') or result.get('error') or result['errcode']}")
+        self.verify(edit)
+        return "saved"
+
+    def verify(self, edit):
+        """Read the asset back through the API and compare it with the edit."""
+        data = self.api.get(f"assets/{edit.asset_id}")
+        asset = data[0] if isinstance(data, list) and data else data
+        if not isinstance(asset, dict):
+            raise HTTPEditFailed("asset not returned by the API")
+        if edit.replace_url and asset.get("url") != edit.replace_url:
+            raise HTTPEditFailed(f"read-back URL is {asset.get('url')}")
+        if edit.toggle_proxy:
+            enabled = bool((asset.get("meta") or {}).get("enable_proxy"))
+            if enabled != (edit.toggle_proxy == "Yes"):
+                raise HTTPEditFailed(f"read-back “Use Proxy?” is {'Yes' if enabled else 'No'}")
@@ -0,0 +1,192 @@
+# file: libapps_trace.py
+
+# Per-action tracing for the Playwright steps of the LibApps scripts. Pages
+# wrapped with `TracedPage` record a span for every goto, fill, click,
+# screenshot, expect_response, and wait_for_* call, including those made
+# through the locators they return, and `expect()` records a span for every
+# assertion. Each span has the asset being edited, the action, its selector
+# (or URL), and its duration; spans are appended to a JSON-lines file once
+# `TRACER.start()` is given one, and `TRACER.summary()` prints the p50/p95
+# duration of each action.
+#
+# Playwright trace files for failing assets are written by `Artifacts` in
+# `libapps_browser.py`.
+
+# Optional values in `settings.ini` include:
+#
+# - LIBAPPS_TRACE_SPANS [write spans to the output directory; default: True]
+
+import json
+import re
+import statistics
+import threading
+import time
+
+from collections import defaultdict
+from contextlib import contextmanager
+
+from decouple import config  # pypi python-decouple
+from playwright.sync_api import expect as playwright_expect
+
+TRACED_METHODS = {"goto", "fill", "click", "check", "press", "screenshot", "expect_response"}
+LOCATOR_METHODS = {"locator", "filter", "nth", "get_by_role", "get_by_title", "get_by_label", "get_by_text", "get_by_placeholder"}
+LOCATOR_PROPERTIES = {"first", "last"}
+
+
+def percentile(values, q):
+    """The `q`th percentile of `values`."""
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[q - 1]
+
+
+def describe_selector(target):
+    """Selector of a locator (from its repr), or the target itself for strings."""
+    if isinstance(target, str):
+        return target
+    match = re.search(r"selector=(['\"])(.*)\1>$", repr(target))
+    return match.group(2) if match else ""
+
+
+class Tracer:
+    """Record spans of page actions across worker threads."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.durations = defaultdict(list)
+        self.local = threading.local()
+        self.path = None
+
+    def start(self, path):
+        """Append spans to `path` from now on."""
+        if config("LIBAPPS_TRACE_SPANS", default=True, cast=bool):
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self.path = path
+
+    def start_item(self, asset_id):
+        """Attribute the current thread's next spans to `asset_id`."""
+        self.local.asset_id = asset_id
+
+    @contextmanager
+    def span(self, action, selector=""):
+        started = time.monotonic()
+        error = None
+        try:
+            yield
+        except Exception as e:
+            error = str(e).strip().splitlines()[0] if str(e).strip() else type(e).__name__
+            raise
+        finally:
+            seconds = time.monotonic() - started
+            span = {
+                "asset_id": getattr(self.local, "asset_id", None),
+                "action": action,
+                "selector": selector,
+                "seconds": round(seconds, 3),
+            }
+            if error:
+                span["error"] = error
+            with self.lock:
+                self.durations[action].append(seconds)
+                if self.path:
+                    with open(self.path, "a") as f:
+                        f.write(json.dumps(span) + "\n")
+
+    def summary(self):
+        with self.lock:
+            durations = {k: sorted(v) for k, v in self.durations.items()}
+        for action, seconds in sorted(durations.items()):
+            print(
+                f"🔬 {action}: {len(seconds)}× p50 {percentile(seconds, 50):.2f}s"
+                f" p95 {percentile(seconds, 95):.2f}s total {sum(seconds):.1f}s"
+            )
+        if self.path:
+            print(f"🔬 spans in {self.path}")
+
+
+TRACER = Tracer()
+
+
+def unwrap(value):
+    return value.target if isinstance(value, Traced) else value
+
+
+class Traced:
+    """Proxy for a Playwright page or locator that traces its actions."""
+
+    def __init__(self, target, tracer=TRACER):
+        self.target = target
+        self.tracer = tracer
+
+    def __getattr__(self, name):
+        attribute = getattr(self.target, name)
+        if name in LOCATOR_PROPERTIES:
+            return TracedLocator(attribute, self.tracer)
+        if not callable(attribute):
+            return attribute
+        if name in LOCATOR_METHODS:
+            return lambda *args, **kwargs: TracedLocator(
+                attribute(*args, **{k: unwrap(v) for k, v in kwargs.items()}), self.tracer
+            )
+        if name in TRACED_METHODS or name.startswith("wait_for"):
+            return self.traced(name, attribute)
+        return attribute
+
+    def traced(self, name, method):
+        def call(*args, **kwargs):
+            selector = self.selector(args)
+            if name == "expect_response":
+                return self.traced_response(method, selector, *args, **kwargs)
+            with self.tracer.span(name, selector):
+                return method(*args, **kwargs)
+
+        return call
+
+    @contextmanager
+    def traced_response(self, method, selector, *args, **kwargs):
+        # NOTE the span covers the action in the `with` block and the wait
+        with self.tracer.span("expect_response", selector):
+            with method(*args, **kwargs) as response_info:
+                yield response_info
+
+
+class TracedPage(Traced):
+    def selector(self, args):
+        """The selector or URL argument, or the name of a predicate."""
+        if not args:
+            return ""
+        if isinstance(args[0], str):
+            return args[0]
+        return getattr(args[0], "__name__", "")
+
+
+class TracedLocator(Traced):
+    def selector(self, args):
+        return describe_selector(self.target)
+
+
+class TracedAssertions:
+    def __init__(self, assertions, selector, tracer):
+        self.assertions = assertions
+        self.selector = selector
+        self.tracer = tracer
+
+    def __getattr__(self, name):
+        assertion = getattr(self.assertions, name)
+
+        def call(*args, **kwargs):
+            with self.tracer.span(f"expect.{name}", self.selector):
+                return assertion(*args, **kwargs)
+
+        return call
+
+
+def expect(target, *args, **kwargs):
+    """Playwright's `expect()` that also accepts traced pages and locators and traces their assertions."""
+    if not isinstance(target, Traced):
+        return playwright_expect(target, *args, **kwargs)
+    return TracedAssertions(
+        playwright_expect(target.target, *args, **kwargs),
+        target.selector(()) if isinstance(target, TracedLocator) else "",
+        target.tracer,
+    )
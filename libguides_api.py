@@ -0,0 +1,275 @@
+# file: libguides_api.py
+
+# Shared client for the LibGuides API used by the LibApps scripts. Requests go
+# through one pooled `requests.Session` (keep-alive, gzip) with timeouts, are
+# paced by the shared adaptive rate limiter (see `rate_limiter.py`), and are
+# retried with backoff on 429/5xx responses, which also slow the limiter down.
+# Responses are cached on disk and revalidated with ETag/Last-Modified so
+# repeated runs only download what changed. Array responses can be parsed
+# incrementally while they download.
+# Guide requests for many groups or IDs are split and fetched concurrently,
+# and items can be trimmed to the fields a script needs.
+
+# Required values in `settings.ini` include:
+#
+# - LIBGUIDES_API_SITE_ID
+# - LIBGUIDES_API_KEY
+#
+# Optional values in `settings.ini` include:
+#
+# - LIBGUIDES_API_BASE_URL [default: https://lgapi-us.libapps.com/1.1]
+# - LIBGUIDES_API_CACHE_DIR [default: _cache/libguides_api]
+# - LIBGUIDES_API_TIMEOUT [seconds; default: 120]
+# - LIBGUIDES_API_MAX_WORKERS [concurrent requests for split requests; default: 4]
+
+import codecs
+import concurrent.futures
+import hashlib
+import itertools
+import json
+import time
+
+from pathlib import Path
+
+import requests
+
+from decouple import config  # pypi python-decouple
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from rate_limiter import shared_limiter
+
+API_BASE_URL = config("LIBGUIDES_API_BASE_URL", default="https://lgapi-us.libapps.com/1.1")
+CHUNK_SIZE = 64 * 1024
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class LibGuidesAPI:
+    def __init__(
+        self,
+        site_id=None,
+        key=None,
+        cache_dir=None,
+        timeout=None,
+        retries=5,
+        backoff_factor=1,
+        limiter=None,
+    ):
+        self.site_id = site_id or config("LIBGUIDES_API_SITE_ID")
+        self.key = key or config("LIBGUIDES_API_KEY")
+        self.cache_dir = Path(
+            cache_dir or config("LIBGUIDES_API_CACHE_DIR", default="_cache/libguides_api")
+        )
+        # NOTE (connect, read); the assets dump can take a while to generate
+        self.timeout = (10, timeout or config("LIBGUIDES_API_TIMEOUT", default=120, cast=int))
+        self.session = requests.Session()
+        self.session.headers.update({"Accept-Encoding": "gzip, deflate"})
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.limiter = limiter or shared_limiter()
+        # NOTE urllib3 only retries connection errors; 429/5xx responses are
+        # retried in `send()` so the rate limiter sees them
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            allowed_methods=["GET"],
+        )
+        adapter = HTTPAdapter(max_retries=retry, pool_maxsize=8)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def cache_paths(self, endpoint, params):
+        # NOTE the API key is left out so rotating it does not invalidate the
+        # cache; the site and base URL are included so configs can share it
+        cache_key = hashlib.sha256(
+            json.dumps([API_BASE_URL, str(self.site_id), endpoint, sorted(params.items())]).encode()
+        ).hexdigest()
+        return (
+            self.cache_dir.joinpath(f"{cache_key}.json"),
+            self.cache_dir.joinpath(f"{cache_key}.headers.json"),
+        )
+
+    def iter_body(self, endpoint, **params):
+        """Yield the raw response body of `endpoint` in chunks as it downloads.
+
+        A 304 replays the cached body; a fresh body with validators is written
+        to the cache alongside the download and only kept once complete.
+        """
+        params = {k: v for k, v in params.items() if v is not None}
+        body_path, headers_path = self.cache_paths(endpoint, params)
+        headers = {}
+        if body_path.exists() and headers_path.exists():
+            with open(headers_path) as f:
+                cached_headers = json.load(f)
+            if cached_headers.get("ETag"):
+                headers["If-None-Match"] = cached_headers["ETag"]
+            if cached_headers.get("Last-Modified"):
+                headers["If-Modified-Since"] = cached_headers["Last-Modified"]
+        with self.send(endpoint, params, headers) as response:
+            if response.status_code == 304:
+                with open(body_path, "rb") as f:
+                    yield from iter(lambda: f.read(CHUNK_SIZE), b"")
+                return
+            response.raise_for_status()
+            validators = {
+                k: response.headers[k] for k in ("ETag", "Last-Modified") if k in response.headers
+            }
+            if not validators:
+                yield from response.iter_content(CHUNK_SIZE)
+                return
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            partial_path = body_path.with_suffix(".partial")
+            with open(partial_path, "wb") as f:
+                for chunk in response.iter_content(CHUNK_SIZE):
+                    f.write(chunk)
+                    yield chunk
+            partial_path.replace(body_path)
+            with open(headers_path, "w") as f:
+                json.dump(validators, f)
+
+    def send(self, endpoint, params, headers):
+        """GET `endpoint` once the rate limiter allows, retrying 429/5xx responses with backoff."""
+        for attempt in range(self.retries + 1):
+            self.limiter.acquire()
+            response = self.session.get(
+                f"{API_BASE_URL}/{endpoint}",
+                params={"site_id": self.site_id, "key": self.key, **params},
+                headers=headers,
+                timeout=self.timeout,
+                stream=True,
+            )
+            if response.status_code not in RETRY_STATUSES:
+                self.limiter.success()
+                return response
+            self.limiter.throttled(f"HTTP {response.status_code} from /{endpoint}")
+            if attempt == self.retries:
+                return response
+            retry_after = response.headers.get("Retry-After", "")
+            response.close()
+            time.sleep(float(retry_after) if retry_after.isdigit() else self.backoff_factor * 2 ** attempt)
+
+    def get(self, endpoint, **params):
+        """GET `endpoint` (e.g. "guides") and return the parsed JSON response."""
+        return json.loads(b"".join(self.iter_body(endpoint, **params)))
+
+    def iter_items(self, endpoint, **params):
+        """GET `endpoint` and yield the items of its JSON array one at a time while downloading."""
+        yield from iter_json_array(self.iter_body(endpoint, **params))
+
+    def assets(self, **params):
+        return self.get("assets", **params)
+
+    def iter_assets(self, **params):
+        return self.iter_items("assets", **params)
+
+    def map_concurrently(self, func, items, max_workers=None):
+        """`func(item)` for each item, run concurrently, in order."""
+        max_workers = max_workers or config("LIBGUIDES_API_MAX_WORKERS", default=4, cast=int)
+        if len(items) <= 1:
+            return [func(item) for item in items]
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(func, items))
+
+    def get_many(self, calls, max_workers=None):
+        """GET each `(endpoint, params)` call concurrently and return the responses in order."""
+        return self.map_concurrently(lambda call: self.get(call[0], **call[1]), calls, max_workers)
+
+    def guides_by_id(self, ids, params):
+        """Guides with `ids`, in one request; on a 404 the IDs are split until the unknown ones are left out."""
+        try:
+            response = self.get(f"guides/{','.join(ids)}", **params)
+        except requests.HTTPError as e:
+            if e.response is None or e.response.status_code != 404:
+                raise
+            if len(ids) == 1:
+                print(f"⚠️  guide {ids[0]} not found")
+                return []
+            middle = len(ids) // 2
+            return self.guides_by_id(ids[:middle], params) + self.guides_by_id(ids[middle:], params)
+        # NOTE a single guide may come back as an object rather than an array
+        return response if isinstance(response, list) else [response]
+
+    def guides(self, group_ids=None, guide_ids=None, fields=None, chunk_size=50, **params):
+        """Guides, optionally of some groups or with some IDs.
+
+        Each group, and each chunk of `chunk_size` guide IDs, is a separate
+        request, and these are fetched concurrently. Unknown guide IDs are
+        left out, and no IDs means no guides. With `fields`, only those keys
+        of each guide are kept.
+        """
+        if group_ids:
+            calls = [("guides", {**params, "group_ids": group_id}) for group_id in split_ids(group_ids)]
+            responses = [r if isinstance(r, list) else [r] for r in self.get_many(calls)]
+        elif guide_ids is not None:
+            ids = sorted(set(split_ids(guide_ids)))
+            chunks = [ids[i:i + chunk_size] for i in range(0, len(ids), chunk_size)]
+            responses = self.map_concurrently(lambda chunk: self.guides_by_id(chunk, params), chunks)
+        else:
+            response = self.get("guides", **params)
+            responses = [response if isinstance(response, list) else [response]]
+        guides = []
+        seen = set()
+        for response in responses:
+            for guide in response:
+                if guide["id"] in seen:
+                    continue
+                seen.add(guide["id"])
+                guides.append({k: guide[k] for k in fields if k in guide} if fields else guide)
+        return guides
+
+
+def split_ids(ids):
+    """IDs from a comma-separated string or an iterable, as strings."""
+    if isinstance(ids, (str, int)):
+        ids = str(ids).split(",")
+    return [str(i).strip() for i in ids if str(i).strip()]
+
+
+def iter_json_array(chunks):
+    """Incrementally parse a top-level JSON array from byte chunks, yielding each element.
+
+    Only the current element and the unparsed tail of the stream are held in
+    memory, so large responses are processed in roughly constant memory.
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    position = 0
+    started = False
+    finished = False
+    stream = itertools.chain(chunks, [None])
+    for chunk in stream:
+        finished = chunk is None
+        buffer = buffer[position:] + text_decoder.decode(chunk or b"", final=finished)
+        position = 0
+        while True:
+            while position < len(buffer) and buffer[position] in " \t\r\n,":
+                position += 1
+            if position == len(buffer):
+                break
+            if not started:
+                if buffer[position] != "[":
+                    raise ValueError("expected a JSON array")
+                started = True
+                position += 1
+                continue
+            if buffer[position] == "]":
+                # NOTE read the stream to the end so `iter_body` can finish
+                # caching the response
+                for _ in stream:
+                    pass
+                return
+            try:
+                item, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if finished:
+                    raise
+                # NOTE incomplete element; wait for the next chunk
+                break
+            if end == len(buffer) and not finished and not isinstance(item, (dict, list)):
+                # NOTE a bare number may continue in the next chunk
+                break
+            position = end
+            yield item
+    if not started:
+        raise ValueError("expected a JSON array")
@@ -0,0 +1,235 @@
+# file: libguides_snapshot.py
+
+# USAGE: python libguides_snapshot.py sync [--kind assets|guides]
+#        python libguides_snapshot.py snapshots
+#        python libguides_snapshot.py changes --since SNAPSHOT_ID [--kind assets|guides]
+
+# This script keeps a local SQLite snapshot of LibGuides assets and guides so
+# the LibApps scripts can query them without downloading everything from the
+# API again. Each `sync` is incremental: only added, changed, and removed items
+# are written, and every change is kept in a history table so snapshots can be
+# compared (e.g. to find assets that became mis-proxied since the last run).
+
+# Optional values in `settings.ini` include:
+#
+# - LIBGUIDES_SNAPSHOT_DB [default: _cache/libguides.sqlite3]
+
+import datetime
+import hashlib
+import json
+import sqlite3
+import urllib.parse
+
+from pathlib import Path
+
+from decouple import config  # pypi python-decouple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    taken_at TEXT NOT NULL,
+    item_count INTEGER,
+    added INTEGER,
+    changed INTEGER,
+    removed INTEGER
+);
+CREATE TABLE IF NOT EXISTS assets (
+    id INTEGER PRIMARY KEY,
+    type_id INTEGER,
+    name TEXT,
+    url TEXT,
+    url_host TEXT,
+    enable_proxy INTEGER,
+    owner_id INTEGER,
+    content_hash TEXT NOT NULL,
+    snapshot_id INTEGER NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS assets_type_id ON assets (type_id);
+CREATE INDEX IF NOT EXISTS assets_url_host ON assets (url_host);
+CREATE INDEX IF NOT EXISTS assets_enable_proxy ON assets (enable_proxy);
+CREATE INDEX IF NOT EXISTS assets_owner_id ON assets (owner_id);
+CREATE TABLE IF NOT EXISTS guides (
+    id INTEGER PRIMARY KEY,
+    name TEXT,
+    group_id INTEGER,
+    status INTEGER,
+    owner_id INTEGER,
+    content_hash TEXT NOT NULL,
+    snapshot_id INTEGER NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS guides_group_id ON guides (group_id);
+CREATE INDEX IF NOT EXISTS guides_owner_id ON guides (owner_id);
+CREATE TABLE IF NOT EXISTS history (
+    snapshot_id INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    object_id INTEGER NOT NULL,
+    change TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS history_snapshot_id ON history (snapshot_id, kind);
+CREATE INDEX IF NOT EXISTS history_object_id ON history (kind, object_id);
+"""
+
+
+def url_host(url):
+    try:
+        return (urllib.parse.urlsplit(url or "").hostname or "").lower() or None
+    except ValueError:
+        return None
+
+
+def asset_columns(asset):
+    meta = asset.get("meta") or {}
+    return {
+        "type_id": asset.get("type_id"),
+        "name": asset.get("name"),
+        "url": asset.get("url"),
+        "url_host": url_host(asset.get("url")),
+        "enable_proxy": 1 if meta.get("enable_proxy") else 0,
+        "owner_id": asset.get("owner_id"),
+    }
+
+
+def guide_columns(guide):
+    return {
+        "name": guide.get("name"),
+        "group_id": guide.get("group_id"),
+        "status": guide.get("status"),
+        "owner_id": guide.get("owner_id") or (guide.get("owner") or {}).get("id"),
+    }
+
+
+# Request parameters and the function returning the indexed columns of each
+# kind of item; the kind is also its API endpoint and table name
+KINDS = {
+    "assets": ({}, asset_columns),
+    "guides": ({"expand": "owner"}, guide_columns),
+}
+
+
+class LibGuidesSnapshot:
+    def __init__(self, path=None):
+        self.path = Path(path or config("LIBGUIDES_SNAPSHOT_DB", default="_cache/libguides.sqlite3"))
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(self.path)
+        self.db.row_factory = sqlite3.Row
+        self.db.executescript(SCHEMA)
+
+    def sync(self, kind, api=None):
+        """Refresh `kind` ("assets" or "guides") from the API and record what changed."""
+        if api is None:
+            from libguides_api import LibGuidesAPI
+
+            api = LibGuidesAPI()
+        params, columns = KINDS[kind]
+        existing = dict(self.db.execute(f"SELECT id, content_hash FROM {kind}"))
+        # NOTE the initial load is not a change, so it is not recorded in history
+        record_history = bool(existing)
+        with self.db:
+            snapshot_id = self.db.execute(
+                "INSERT INTO snapshots (kind, taken_at) VALUES (?, ?)",
+                (kind, datetime.datetime.now().isoformat(timespec="seconds")),
+            ).lastrowid
+            counts = {"added": 0, "changed": 0, "removed": 0}
+            seen = set()
+            for item in api.iter_items(kind, **params):
+                data = json.dumps(item, sort_keys=True)
+                content_hash = hashlib.sha1(data.encode()).hexdigest()
+                seen.add(item["id"])
+                if existing.get(item["id"]) == content_hash:
+                    continue
+                change = "changed" if item["id"] in existing else "added"
+                counts[change] += 1
+                row = {"id": item["id"], **columns(item), "content_hash": content_hash, "snapshot_id": snapshot_id, "data": data}
+                self.db.execute(
+                    f"INSERT OR REPLACE INTO {kind} ({', '.join(row)}) VALUES ({', '.join('?' * len(row))})",
+                    list(row.values()),
+                )
+                if record_history:
+                    self.db.execute(
+                        "INSERT INTO history VALUES (?, ?, ?, ?, ?)",
+                        (snapshot_id, kind, item["id"], change, data),
+                    )
+            for removed_id in existing.keys() - seen:
+                counts["removed"] += 1
+                (data,) = self.db.execute(f"SELECT data FROM {kind} WHERE id = ?", (removed_id,)).fetchone()
+                self.db.execute(f"DELETE FROM {kind} WHERE id = ?", (removed_id,))
+                self.db.execute(
+                    "INSERT INTO history VALUES (?, ?, ?, ?, ?)",
+                    (snapshot_id, kind, removed_id, "removed", data),
+                )
+            self.db.execute(
+                "UPDATE snapshots SET item_count = ?, added = ?, changed = ?, removed = ? WHERE id = ?",
+                (len(seen), counts["added"], counts["changed"], counts["removed"], snapshot_id),
+            )
+        return snapshot_id, counts
+
+    def query(self, kind, since=None, **filters):
+        """Yield stored items of `kind` as API dicts, filtered on indexed columns.
+
+        Filter values may be a single value or a list of values, e.g.
+        `query("assets", type_id=[2, 5], enable_proxy=1)`. With `since`, only
+        items added or changed after that snapshot are returned.
+        """
+        clauses = []
+        values = []
+        for column, value in filters.items():
+            if isinstance(value, (list, tuple, set)):
+                clauses.append(f"{column} IN ({', '.join('?' * len(value))})")
+                values.extend(value)
+            else:
+                clauses.append(f"{column} = ?")
+                values.append(value)
+        if since is not None:
+            clauses.append("snapshot_id > ?")
+            values.append(since)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        for row in self.db.execute(f"SELECT data FROM {kind}{where} ORDER BY id", values):
+            yield json.loads(row["data"])
+
+    def assets(self, since=None, **filters):
+        return self.query("assets", since=since, **filters)
+
+    def guides(self, since=None, **filters):
+        return self.query("guides", since=since, **filters)
+
+    def snapshots(self):
+        return [dict(row) for row in self.db.execute("SELECT * FROM snapshots ORDER BY id")]
+
+    def changes(self, kind, since):
+        """History rows of `kind` recorded after snapshot `since`."""
+        for row in self.db.execute(
+            "SELECT snapshot_id, object_id, change, data FROM history WHERE kind = ? AND snapshot_id > ? ORDER BY snapshot_id, object_id",
+            (kind, since),
+        ):
+            yield {**dict(row), "data": json.loads(row["data"])}
+
+
+def main(
+    command: ("sync, snapshots, or changes", "positional", None, str, ["sync", "snapshots", "changes"]),  # type: ignore
+    kind: ("assets or guides; default is both", "option", "k", str, ["assets", "guides"]) = None,  # type: ignore
+    since: ("snapshot id to list changes after", "option", "s", int) = None,  # type: ignore
+):
+    snapshot = LibGuidesSnapshot()
+    kinds = [kind] if kind else list(KINDS)
+    if command == "sync":
+        for k in kinds:
+            snapshot_id, counts = snapshot.sync(k)
+            print(f"📸 {k} snapshot {snapshot_id}: {counts['added']} added, {counts['changed']} changed, {counts['removed']} removed")
+    elif command == "snapshots":
+        for row in snapshot.snapshots():
+            print(row["id"], row["kind"], row["taken_at"], f"[{row['item_count']} items: {row['added']} added, {row['changed']} changed, {row['removed']} removed]")
+    elif command == "changes":
+        if since is None:
+            raise SystemExit("❌ --since SNAPSHOT_ID is required for changes")
+        for k in kinds:
+            for change in snapshot.changes(k, since):
+                print(change["snapshot_id"], k, change["object_id"], change["change"], change["data"].get("name"), change["data"].get("url", ""))
+
+
+if __name__ == "__main__":
+    # fmt: off
+    import plac; plac.call(main)
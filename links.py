@@ -1,82 +1,123 @@
 # file: links.py
 
-# USAGE: python links.py _inputs/file.csv
+# USAGE: python links.py [--snapshot] [--workers N] [--backend browser|http] [--resume] _inputs/file.csv
 
 # This script will update the URLs of link assets in LibGuides that are provided
 # in a CSV file. The CSV file should have the columns: "URL" and "NewURL".
 #
+# The old URLs are resolved to asset IDs with an index of all Link assets from
+# the API (or, with `--snapshot`, from the local snapshot; see
+# `libguides_snapshot.py`). A URL matches exactly, or else after normalizing
+# the case of the scheme and host, default ports, fragments, trailing slashes,
+# and percent-encoding of unreserved characters. Encoded reserved characters
+# such as `%2F` and `%26` stay encoded, so they do not match `/` and `&`.
+#
 # Caveats:
 # - It will only update the URL if the two provided URLs are different.
-# - If there are multiple links found with the old URL, it will not update any
-#   of them.
+# - If no link or multiple links are found with the old URL, it will not update
+#   any of them; these rows are reported before any edits are made.
+#
+# The matched links are edited by ID with `--workers` browser workers at once
+# (see `libapps_browser.py`), or over HTTP with `--backend http` (see
+# `libapps_http.py`).
 
 import csv
+import re
+import string
+import urllib.parse
+
+from edit_planner import AssetEdit
+from libguides_snapshot import LibGuidesSnapshot
+
+LINK_TYPE_ID = 2
+UNRESERVED = frozenset(string.ascii_letters + string.digits + "-._~")
+
+
+def normalize_percent_encoding(value):
+    """Decode escapes of unreserved characters and uppercase the others (RFC 3986 6.2.2)."""
+
+    def replace(match):
+        char = chr(int(match.group(1), 16))
+        return char if char in UNRESERVED else match.group(0).upper()
+
+    return re.sub(r"%([0-9A-Fa-f]{2})", replace, value)
 
-from decouple import config  # pypi python-decouple
 
-from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
+def normalize_url(url):
+    """Comparable form of a URL, for matching links that differ only in notation."""
+    url = (url or "").strip()
+    try:
+        parts = urllib.parse.urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return url
+    scheme = parts.scheme.lower()
+    netloc = (parts.hostname or "").lower()
+    if port and (scheme, port) not in (("http", 80), ("https", 443)):
+        netloc = f"{netloc}:{port}"
+    path = normalize_percent_encoding(parts.path).rstrip("/")
+    return urllib.parse.urlunsplit((scheme, netloc, path, normalize_percent_encoding(parts.query), ""))
+
+
+class LinkIndex:
+    """Link asset IDs by exact and by normalized URL."""
+
+    def __init__(self, links):
+        self.exact = {}
+        self.normalized = {}
+        for link in links:
+            self.exact.setdefault(link.get("url"), []).append(link["id"])
+            self.normalized.setdefault(normalize_url(link.get("url")), []).append(link["id"])
+
+    @classmethod
+    def load(cls, store=None):
+        if store:
+            return cls(store.assets(type_id=LINK_TYPE_ID))
+        from libguides_api import LibGuidesAPI
+
+        return cls(a for a in LibGuidesAPI().iter_assets() if a.get("type_id") == LINK_TYPE_ID)
+
+    def resolve(self, url):
+        """Asset IDs matching `url` exactly, or else after normalizing."""
+        return self.exact.get(url) or self.normalized.get(normalize_url(url), [])
 
 
 def main(
+    snapshot: ("resolve URLs against the local snapshot instead of the API", "flag", "s"),  # type: ignore
     csv_file: "path to csv file",  # type: ignore
+    workers: ("number of browser workers", "option", "w", int) = 1,  # type: ignore
+    backend: ("edit with the browser or by replaying the edit form over HTTP", "option", "b", str, ["browser", "http"]) = "browser",  # type: ignore
+    resume: ("skip edits already done in the latest run journal", "flag", "resume") = False,  # type: ignore
 ):
-    with sync_playwright() as playwright:
-        try:
-            b = playwright.firefox.launch()
-            p = b.new_page(
-                base_url=config("LIBAPPS_BASE_URL"), record_video_dir="_outputs"
-            )
-            p.goto("/libapps/login.php")
-            p.fill("#s-libapps-email", config("LIBAPPS_USERNAME"))
-            p.fill("#s-libapps-password", config("LIBAPPS_PASSWORD"))
-            p.click("#s-libapps-login-button")
-            p.wait_for_load_state("networkidle")
-            p.goto("/libguides/assets.php")
-            with open(csv_file) as csv_fp:
-                csv_reader = csv.DictReader(csv_fp)
-                for row in csv_reader:
-                    print("📍", row["Name"])
-                    if row["URL"] == row["NewURL"]:
-                        continue
-                    if row["NewURL"] == "":
-                        continue
-                    print("🔎", row["URL"])
-                    p.locator("#type").select_option("Link")
-                    p.locator("#assets__filter__url").fill(row["URL"])
-                    p.locator(
-                        "#lg-admin-asset-filter .datatable-filter__button--submit"
-                    ).click()
-                    p.wait_for_load_state("networkidle")
-                    p.wait_for_selector(
-                        "#s-lg-admin-datatable-content_processing", state="hidden"
-                    )
-                    if (
-                        p.locator("#s-lg-admin-datatable-content_info")
-                        .text_content()
-                        .startswith("Showing 0 to 0 of 0 entries")
-                    ):
-                        print("❌ NO LINKS FOUND")
-                        continue
-                    elif (
-                        not p.locator("#s-lg-admin-datatable-content_info")
-                        .text_content()
-                        .startswith("Showing 1 to 1 of 1 entries")
-                    ):
-                        print("❌ MULTIPLE LINKS FOUND")
-                        continue
-                    else:
-                        p.locator(".fa-edit").click()
-                        p.locator("#url").fill(row["NewURL"])
-                        # clicking the label rather than the input works
-                        p.locator("#label-enable_proxy_0").click()
-                        p.wait_for_load_state("networkidle")
-                        p.locator("#s-lib-alert-btn-first").click()
-                        p.wait_for_load_state("networkidle")
-                        print("✅", row["NewURL"])
-            b.close()
-        except PlaywrightTimeoutError as e:
-            print(e)
-            b.close()
+    index = LinkIndex.load(LibGuidesSnapshot() if snapshot else None)
+    edits = []
+    not_found = 0
+    multiple = 0
+    with open(csv_file) as csv_fp:
+        csv_reader = csv.DictReader(csv_fp)
+        for row in csv_reader:
+            print("📍", row["Name"])
+            if row["URL"] == row["NewURL"]:
+                continue
+            if row["NewURL"] == "":
+                continue
+            print("🔎", row["URL"])
+            ids = index.resolve(row["URL"])
+            if len(ids) == 0:
+                print("❌ NO LINKS FOUND")
+                not_found += 1
+                continue
+            elif len(ids) > 1:
+                print("❌ MULTIPLE LINKS FOUND", ", ".join(str(i) for i in ids))
+                multiple += 1
+                continue
+            edits.append(AssetEdit(ids[0], "Link", replace_url=row["NewURL"], toggle_proxy="No"))
+    print(f"\n🔗 {len(edits)} links to edit; {not_found} not found, {multiple} with multiple matches")
+    if edits:
+        # NOTE Playwright is only imported and started when there is something to edit
+        from libapps_browser import EditExecutor
+
+        EditExecutor(workers=workers, output_dir="_outputs/links", backend=backend, resume=resume).run(edits)
 
 
 if __name__ == "__main__":
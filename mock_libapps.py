@@ -0,0 +1,330 @@
+# file: mock_libapps.py
+
+# USAGE: python mock_libapps.py [--port 8000] [--assets 100] [--prefix URL] [--latency SECONDS]
+
+# Local stand-in for LibApps for trying out the edit scripts without touching
+# production. It serves a login form that sets a session cookie, the
+# `/libguides/assets.php` and `/libguides/az.php` admin pages with a
+# DataTables-style table filtered by ID over XHR, the edit modal and its POST
+# handler, and the `/1.1/assets` and `/1.1/guides` API endpoints, all backed
+# by synthetic in-memory data. API responses carry `ETag` and `Last-Modified`
+# validators and a matching `If-None-Match` gets a 304, so the API client's
+# cache is exercised. Every response can be delayed by `latency` seconds
+# (±50%) to approximate a remote server. Point the scripts at it with these
+# `settings.ini` values:
+#
+# - LIBAPPS_BASE_URL=http://localhost:8000
+# - LIBGUIDES_API_BASE_URL=http://localhost:8000/1.1
+
+import email.utils
+import hashlib
+import html
+import http.server
+import json
+import random
+import secrets
+import threading
+import time
+import urllib.parse
+
+TYPES = {2: "Link", 5: "Book from the Catalog", 10: "Database"}
+DATABASE_TYPE_ID = 10
+PAGE_LENGTH = 25
+
+ADMIN_PAGE = """<!DOCTYPE html>
+<html><head><title>{title}</title></head><body>
+<h1>{title}</h1>
+<label for="filter-id">ID</label> <input id="filter-id" type="text">
+<table id="s-lg-assets-table">
+<thead><tr><th>ID</th><th>Name</th><th>URL</th><th>Actions</th></tr></thead>
+<tbody></tbody>
+</table>
+<div id="s-lg-assets-table_info" role="status">Showing 0 to 0 of 0 entries</div>
+<div id="s-lg-modal" role="dialog" hidden></div>
+<script>
+const scope = "{scope}";
+const filter = document.getElementById("filter-id");
+const tbody = document.querySelector("tbody");
+const info = document.getElementById("s-lg-assets-table_info");
+const modal = document.getElementById("s-lg-modal");
+
+function cell(text) {{
+  const td = document.createElement("td");
+  td.textContent = text;
+  return td;
+}}
+
+async function draw() {{
+  const query = new URLSearchParams({{action: "table", scope, id: filter.value.trim()}});
+  const response = await fetch("/libguides/assets_process.php?" + query);
+  const table = await response.json();
+  tbody.replaceChildren(...table.data.map((asset) => {{
+    const tr = document.createElement("tr");
+    tr.append(cell(String(asset.id)), cell(asset.name), cell(asset.url));
+    const actions = document.createElement("td");
+    const edit = document.createElement("a");
+    edit.href = "#";
+    edit.title = "Edit Item";
+    edit.textContent = "✎";
+    edit.addEventListener("click", (event) => {{ event.preventDefault(); openEditor(asset.id); }});
+    actions.append(edit);
+    tr.append(actions);
+    return tr;
+  }}));
+  const shown = table.data.length;
+  info.textContent = `Showing ${{shown ? 1 : 0}} to ${{shown}} of ${{table.recordsFiltered}} entries` +
+    (table.recordsFiltered < table.recordsTotal ? ` (filtered from ${{table.recordsTotal}} total entries)` : "");
+}}
+
+async function openEditor(id) {{
+  const response = await fetch(`${{location.pathname}}?action=edit&asset_id=${{id}}`);
+  modal.innerHTML = await response.text();
+  modal.hidden = false;
+  const form = modal.querySelector("form");
+  form.querySelector("button[type=button]").addEventListener("click", closeEditor);
+  form.addEventListener("submit", async (event) => {{
+    event.preventDefault();
+    const saved = await fetch(form.action, {{method: "POST", body: new URLSearchParams(new FormData(form))}});
+    const result = saved.ok ? await saved.json() : {{errcode: saved.status}};
+    if (result.errcode) {{
+      modal.querySelector("form").insertAdjacentHTML("beforeend", `<p class="alert">Error ${{result.errcode}}</p>`);
+    }} else {{
+      closeEditor();
+    }}
+  }});
+}}
+
+function closeEditor() {{
+  modal.hidden = true;
+  modal.replaceChildren();
+}}
+
+filter.addEventListener("keyup", draw);
+draw();
+</script>
+</body></html>
+"""
+
+
+def synthetic_assets(count, prefix):
+    assets = {}
+    for i in range(1, count + 1):
+        type_id = [2, 5, 10][i % 3]
+        url = f"https://resource{i}.example.com/item/{i}"
+        if i % 4 == 0:
+            url = prefix + urllib.parse.quote(url, safe="")
+        assets[i] = {
+            "id": i,
+            "type_id": type_id,
+            "name": f"Example {TYPES[type_id]} {i}",
+            "url": url,
+            "owner_id": 100 + i % 7,
+            "meta": {"enable_proxy": 1 if i % 5 == 0 else 0},
+        }
+    return assets
+
+
+def synthetic_guides(count):
+    return [
+        {"id": i, "name": f"Example Guide {i}", "group_id": i % 4, "status": 1, "owner_id": 100 + i % 7}
+        for i in range(1, count + 1)
+    ]
+
+
+class MockLibApps:
+    def __init__(self, assets, guides, latency=0):
+        self.assets = assets
+        self.guides = guides
+        self.latency = latency
+        self.sessions = set()
+        self.tokens = {}
+        self.lock = threading.Lock()
+        # NOTE the time of the last saved edit, sent as `Last-Modified`
+        self.modified = time.time()
+
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    server_version = "MockLibApps/1.0"
+
+    @property
+    def state(self):
+        return self.server.state
+
+    def log_message(self, format, *args):
+        pass
+
+    def delay(self):
+        if self.state.latency:
+            time.sleep(self.state.latency * random.uniform(0.5, 1.5))
+
+    def send(self, status, body="", content_type="text/html; charset=utf-8", headers=None):
+        data = body.encode() if isinstance(body, str) else body
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def send_json(self, data, status=200):
+        self.send(status, json.dumps(data), "application/json")
+
+    def redirect(self, location, headers=None):
+        self.send(302, "", headers={"Location": location, **(headers or {})})
+
+    def logged_in(self):
+        cookies = {}
+        for part in self.headers.get("Cookie", "").split(";"):
+            name, _, value = part.strip().partition("=")
+            cookies[name] = value
+        return cookies.get("lasid") in self.state.sessions
+
+    def form_data(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return {k: v[-1] for k, v in urllib.parse.parse_qs(self.rfile.read(length).decode(), keep_blank_values=True).items()}
+
+    def do_GET(self):
+        self.delay()
+        url = urllib.parse.urlsplit(self.path)
+        query = {k: v[-1] for k, v in urllib.parse.parse_qs(url.query).items()}
+        if url.path.startswith("/1.1/"):
+            return self.api(url.path[len("/1.1/"):], query)
+        if url.path == "/libapps/login.php":
+            return self.send(
+                200,
+                '<form method="post"><input id="s-libapps-email" name="email">'
+                '<input id="s-libapps-password" name="password" type="password">'
+                '<button id="s-libapps-login-button">Log In</button></form>',
+            )
+        if not self.logged_in():
+            return self.redirect("/libapps/login.php")
+        if url.path in ("/libguides/assets.php", "/libguides/az.php"):
+            if query.get("action") == "edit":
+                return self.edit_form(query.get("asset_id"))
+            if url.path == "/libguides/az.php":
+                return self.send(200, ADMIN_PAGE.format(title="A-Z Database List", scope="az"))
+            return self.send(200, ADMIN_PAGE.format(title="Assets", scope="assets"))
+        if url.path == "/libguides/assets_process.php" and query.get("action") == "table":
+            return self.table(query.get("scope"), query.get("id", ""))
+        if url.path.startswith("/libapps/") or url.path.startswith("/libguides/"):
+            return self.send(200, "<h1>LibApps</h1>")
+        self.send(404, "not found")
+
+    def do_POST(self):
+        self.delay()
+        url = urllib.parse.urlsplit(self.path)
+        if url.path == "/libapps/login.php":
+            self.form_data()
+            session = secrets.token_hex(16)
+            with self.state.lock:
+                self.state.sessions.add(session)
+            return self.redirect("/libapps/", {"Set-Cookie": f"lasid={session}; Path=/; HttpOnly"})
+        if not self.logged_in():
+            return self.redirect("/libapps/login.php")
+        if url.path == "/libguides/assets_process.php":
+            return self.save(self.form_data())
+        self.send(404, "not found")
+
+    def edit_form(self, asset_id):
+        asset = self.state.assets.get(int(asset_id or 0))
+        if not asset:
+            return self.send(404, "asset not found")
+        token = secrets.token_hex(8)
+        with self.state.lock:
+            self.state.tokens[token] = asset["id"]
+        enabled = asset["meta"]["enable_proxy"]
+        self.send(
+            200,
+            '<form id="s-lg-asset-form" method="post" action="/libguides/assets_process.php">'
+            f'<input type="hidden" name="action" value="save">'
+            f'<input type="hidden" name="asset_id" value="{asset["id"]}">'
+            f'<input type="hidden" name="csrf_token" value="{token}">'
+            f'<label for="name">Name</label><input id="name" name="name" value="{html.escape(asset["name"])}">'
+            f'<label for="url">{"Link URL" if TYPES[asset["type_id"]] == "Link" else "URL"}</label>'
+            f'<input id="url" name="url" value="{html.escape(asset["url"])}">'
+            f'<div id="form-group-enable_proxy">'
+            f'<input type="radio" id="enable_proxy_0" name="enable_proxy" value="0"{"" if enabled else " checked"}>'
+            f'<label id="label-enable_proxy_0" for="enable_proxy_0">No</label>'
+            f'<input type="radio" id="enable_proxy_1" name="enable_proxy" value="1"{" checked" if enabled else ""}>'
+            f'<label id="label-enable_proxy_1" for="enable_proxy_1">Yes</label></div>'
+            '<button type="submit">Save</button><button type="button">Cancel</button></form>',
+        )
+
+    def table(self, scope, asset_id):
+        """DataTables response for the assets (or A-Z databases) table filtered by exact ID."""
+        with self.state.lock:
+            items = [
+                a for a in self.state.assets.values()
+                if (a["type_id"] == DATABASE_TYPE_ID) == (scope == "az")
+            ]
+            total = len(items)
+            if asset_id:
+                items = [a for a in items if str(a["id"]) == asset_id]
+            data = [{"id": a["id"], "name": a["name"], "url": a["url"]} for a in items[:PAGE_LENGTH]]
+        self.send_json({"recordsTotal": total, "recordsFiltered": len(items), "data": data})
+
+    def save(self, fields):
+        with self.state.lock:
+            asset_id = self.state.tokens.pop(fields.get("csrf_token"), None)
+            if asset_id is None or str(asset_id) != fields.get("asset_id"):
+                return self.send_json({"errcode": 1, "errmsg": "invalid token"})
+            asset = self.state.assets[asset_id]
+            asset["name"] = fields.get("name", asset["name"])
+            asset["url"] = fields.get("url", asset["url"])
+            asset["meta"]["enable_proxy"] = 1 if fields.get("enable_proxy") == "1" else 0
+            self.state.modified = time.time()
+        self.send_json({"errcode": 0, "data": {"id": asset_id}})
+
+    def api(self, endpoint, query):
+        name, _, ids = endpoint.partition("/")
+        if name == "assets":
+            with self.state.lock:
+                if ids:
+                    items = [self.state.assets[int(i)] for i in ids.split(",") if int(i) in self.state.assets]
+                else:
+                    items = list(self.state.assets.values())
+                body = json.dumps(items)
+        elif name == "guides":
+            items = self.state.guides
+            if query.get("group_ids"):
+                group_ids = {int(g) for g in query["group_ids"].split(",")}
+                items = [g for g in items if g["group_id"] in group_ids]
+            if ids:
+                wanted = {int(i) for i in ids.split(",")}
+                items = [g for g in items if g["id"] in wanted]
+            body = json.dumps(items)
+        else:
+            return self.send_json({"error": "unknown endpoint"}, 404)
+        validators = {
+            "ETag": f'"{hashlib.sha1(body.encode()).hexdigest()}"',
+            "Last-Modified": email.utils.formatdate(self.state.modified, usegmt=True),
+        }
+        if self.headers.get("If-None-Match") == validators["ETag"]:
+            return self.send(304, "", "application/json", validators)
+        self.send(200, body, "application/json", validators)
+
+
+def serve(port=8000, assets=100, prefix="https://proxy.example.edu/login?url=", guides=20, latency=0):
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    server.state = MockLibApps(synthetic_assets(assets, prefix), synthetic_guides(guides), latency)
+    return server
+
+
+def main(
+    port: ("port to listen on", "option", "p", int) = 8000,  # type: ignore
+    assets: ("number of synthetic assets", "option", "a", int) = 100,  # type: ignore
+    prefix: ("proxy prefix used in synthetic asset URLs", "option", "prefix", str) = "https://proxy.example.edu/login?url=",  # type: ignore
+    latency: ("mean seconds added to every response", "option", "l", float) = 0,  # type: ignore
+):
+    server = serve(port, assets, prefix, latency=latency)
+    print(f"🧪 mock LibApps on http://127.0.0.1:{server.server_address[1]} with {assets} assets")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    # fmt: off
+    import plac; plac.call(main)
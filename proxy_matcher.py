@@ -0,0 +1,119 @@
+# file: proxy_matcher.py
+
+# Matcher for proxy prefixes and exception domains used by the LibApps proxy
+# scripts. It is built once from `settings.ini` instead of re-reading and
+# splitting the settings for every URL:
+#
+# - proxy prefixes are matched at the start of the URL with a character trie,
+#   returning the longest matching prefix
+# - exception domains are matched against the hostname of the parsed target
+#   URL (the URL with any proxy prefix removed) with an index of reversed
+#   hostname labels, so `exception.example.com` matches itself and its
+#   subdomains but not the same text inside a path or query string; entries
+#   may be written as URLs or with a port, but not with a path
+
+import urllib.parse
+
+from typing import NamedTuple, Optional
+
+from decouple import config  # pypi python-decouple
+
+# NOTE marks the end of a prefix or domain in the tries below
+END = ""
+
+
+class ProxyClassification(NamedTuple):
+    url: str
+    # proxy prefix found at the start of `url`, if any
+    prefix: Optional[str]
+    # `url` with the proxy prefix removed and unquoted; `url` when not proxied
+    target_url: str
+    # exception domain matching the hostname of `target_url`, if any
+    exception_domain: Optional[str]
+
+
+def exception_host(entry):
+    """Hostname of an exception domain entry, which may be written as a URL or with a port."""
+    entry = entry.strip()
+    if not entry:
+        return None
+    # NOTE without a scheme, urlsplit() would read the whole entry as a path
+    parts = urllib.parse.urlsplit(entry if "://" in entry else f"//{entry}")
+    if parts.path.strip("/") or parts.query or parts.fragment:
+        raise SystemExit(f"❌ exception domains match whole hosts; remove the path from {entry}")
+    return parts.hostname
+
+
+class ProxyMatcher:
+    def __init__(self, prefixes, exception_domains):
+        self.prefix_trie = {}
+        for prefix in prefixes:
+            prefix = prefix.strip()
+            if not prefix:
+                continue
+            node = self.prefix_trie
+            for character in prefix:
+                node = node.setdefault(character, {})
+            node[END] = prefix
+        self.domain_index = {}
+        for entry in exception_domains:
+            domain = exception_host(entry)
+            if not domain:
+                continue
+            node = self.domain_index
+            for label in reversed(domain.split(".")):
+                node = node.setdefault(label, {})
+            node[END] = domain
+        self.host_cache = {}
+
+    @classmethod
+    def from_settings(cls, prefix_settings=("PROXY_PREFIXES",)):
+        """Build a matcher from comma-separated prefix settings and `EXCEPTION_DOMAINS`."""
+        prefixes = [
+            prefix
+            for setting in prefix_settings
+            for prefix in config(setting, default="").split(",")
+        ]
+        return cls(prefixes, config("EXCEPTION_DOMAINS", default="").split(","))
+
+    def match_prefix(self, url):
+        """Longest proxy prefix at the start of `url`, or None."""
+        node = self.prefix_trie
+        longest = None
+        for character in url:
+            node = node.get(character)
+            if node is None:
+                break
+            longest = node.get(END, longest)
+        return longest
+
+    def match_exception_host(self, host):
+        """Exception domain that `host` equals or is a subdomain of, or None."""
+        if host not in self.host_cache:
+            node = self.domain_index
+            match = None
+            for label in reversed(host.split(".")):
+                node = node.get(label)
+                if node is None:
+                    break
+                match = node.get(END, match)
+            self.host_cache[host] = match
+        return self.host_cache[host]
+
+    def match_exception_domain(self, url):
+        try:
+            host = urllib.parse.urlsplit(url.strip()).hostname
+        except ValueError:
+            return None
+        if not host:
+            return None
+        return self.match_exception_host(host)
+
+    def classify_one(self, url):
+        prefix = self.match_prefix(url)
+        target_url = urllib.parse.unquote(url[len(prefix):]) if prefix else url
+        return ProxyClassification(url, prefix, target_url, self.match_exception_domain(target_url))
+
+    def classify(self, urls):
+        """Classify many URLs, e.g. every URL of a full asset export."""
+        return [self.classify_one(url) for url in urls]
@@ -0,0 +1,96 @@
+# file: rate_limiter.py
+
+# Adaptive rate limiter shared by everything that talks to LibApps: LibGuides
+# API requests, HTTP form edits, and browser edits. It is a token bucket whose
+# rate grows additively while requests succeed and is cut multiplicatively
+# when LibApps pushes back (429 or 5xx responses, or browser timeouts), so
+# concurrent jobs run as fast as LibApps allows without hammering it.
+
+# Optional values in `settings.ini` include:
+#
+# - LIBAPPS_RATE [initial requests per second; default: 2]
+# - LIBAPPS_MIN_RATE [default: 0.2]
+# - LIBAPPS_MAX_RATE [default: 10]
+
+import threading
+import time
+
+from decouple import config  # pypi python-decouple
+
+
+class AdaptiveRateLimiter:
+    """Token bucket with additive-increase/multiplicative-decrease of its rate."""
+
+    def __init__(self, rate=None, min_rate=None, max_rate=None, burst=1, increase=0.1, decrease=0.5):
+        self.rate = rate or config("LIBAPPS_RATE", default=2.0, cast=float)
+        self.min_rate = min_rate or config("LIBAPPS_MIN_RATE", default=0.2, cast=float)
+        self.max_rate = max_rate or config("LIBAPPS_MAX_RATE", default=10.0, cast=float)
+        self.burst = burst
+        # NOTE the rate grows by about `increase` per second of successful requests
+        self.increase = increase
+        self.decrease = decrease
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.last_decrease = 0
+        self.waiting = 0
+        self.throttles = 0
+        self.lock = threading.Lock()
+
+    def refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, cost=1):
+        """Block until `cost` tokens are available and take them."""
+        with self.lock:
+            self.waiting += 1
+        try:
+            while True:
+                with self.lock:
+                    now = time.monotonic()
+                    self.refill(now)
+                    if self.tokens >= cost:
+                        self.tokens -= cost
+                        return
+                    delay = (cost - self.tokens) / self.rate
+                time.sleep(delay)
+        finally:
+            with self.lock:
+                self.waiting -= 1
+
+    # NOTE the executor in libapps_browser.py calls wait() between edits
+    wait = acquire
+
+    def success(self):
+        with self.lock:
+            self.rate = min(self.max_rate, self.rate + self.increase / self.rate)
+
+    def throttled(self, reason=""):
+        """Cut the rate after LibApps pushed back; one cut per second at most."""
+        with self.lock:
+            now = time.monotonic()
+            if now - self.last_decrease < 1:
+                return
+            self.last_decrease = now
+            self.throttles += 1
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+            self.tokens = min(self.tokens, 0)
+            rate, waiting = self.rate, self.waiting
+        print(f"🚦 slowing down to {rate:.2f}/s ({waiting} waiting){f': {reason}' if reason else ''}")
+
+    def status(self):
+        with self.lock:
+            return f"{self.rate:.2f}/s, {self.waiting} waiting, {self.throttles} slowdowns"
+
+
+SHARED_LIMITER = None
+SHARED_LIMITER_LOCK = threading.Lock()
+
+
+def shared_limiter():
+    """The limiter shared by all LibApps traffic in this process."""
+    global SHARED_LIMITER
+    with SHARED_LIMITER_LOCK:
+        if SHARED_LIMITER is None:
+            SHARED_LIMITER = AdaptiveRateLimiter()
+        return SHARED_LIMITER
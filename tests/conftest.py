@@ -0,0 +1,6 @@
+import sys
+
+from pathlib import Path
+
+# NOTE the scripts are top-level modules in the repository root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
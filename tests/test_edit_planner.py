@@ -0,0 +1,38 @@
+import csv
+import json
+
+import asset_proxy_cleanup
+import edit_planner
+
+ROW = {
+    "id": 1,
+    "type": "Link",
+    "name": "Resource",
+    "url": "https://resource.example.com/",
+    "use_proxy": "No",
+    "proxy_prefix": "",
+    "replace_url": "",
+    "toggle_proxy": "Yes",
+    "exception_domain": "",
+}
+
+
+def test_report_uses_the_plan_writer():
+    assert asset_proxy_cleanup.PlanWriter is edit_planner.PlanWriter
+
+
+def test_plan_writer_csv_and_json(tmp_path):
+    for name in ("plan.csv", "plan.json"):
+        with edit_planner.PlanWriter(tmp_path / name) as writer:
+            writer.write(ROW)
+            writer.write({**ROW, "id": 2})
+    with open(tmp_path / "plan.csv", newline="") as f:
+        assert [row["id"] for row in csv.DictReader(f)] == ["1", "2"]
+    with open(tmp_path / "plan.json") as f:
+        assert [row["id"] for row in json.load(f)] == [1, 2]
+
+
+def test_plan_writer_without_path():
+    with edit_planner.PlanWriter(None) as writer:
+        writer.write(ROW)
+    assert writer.count == 1
@@ -0,0 +1,75 @@
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+import guides_layout
+
+from guides_layout import LayoutCache, LayoutRules, migrate_guide
+from libapps_browser import save_response_matcher
+
+
+def fake_response(url, method="POST", resource_type="xhr", status=200):
+    request = SimpleNamespace(method=method, resource_type=resource_type)
+    return SimpleNamespace(url=url, request=request, status=status, ok=status < 400)
+
+
+class FakeLayoutPage:
+    """Guide admin page whose layout select shows `layouts` in turn and whose Save posts `responses`."""
+
+    def __init__(self, layouts, responses):
+        self.layouts = list(layouts)
+        self.responses = responses
+
+    def goto(self, url):
+        pass
+
+    def get_by_title(self, title):
+        return self
+
+    def get_by_role(self, role, name=None):
+        return self
+
+    def locator(self, selector):
+        return self
+
+    def click(self):
+        pass
+
+    def text_content(self):
+        return self.layouts.pop(0)
+
+    @contextmanager
+    def expect_response(self, predicate, timeout=None):
+        info = SimpleNamespace()
+        yield info
+        info.value = next(r for r in self.responses if predicate(r))
+
+
+def test_save_response_matches_only_the_pattern():
+    is_layout_save = save_response_matcher(guides_layout.SAVE_PATTERN)
+    assert is_layout_save(fake_response("https://libguides.example.edu/libguides/guide_process.php"))
+    assert not is_layout_save(fake_response("https://libguides.example.edu/libapps/keepalive.php"))
+    assert not is_layout_save(fake_response("https://libguides.example.edu/libguides/guide_process.php", method="GET"))
+
+
+def test_layout_is_cached_only_as_read_back_after_saving(tmp_path):
+    rules = LayoutRules(guides_layout.RULES["update"])
+    cache = LayoutCache(tmp_path / "layouts.json")
+    responses = [
+        fake_response("https://libguides.example.edu/libapps/keepalive.php"),
+        fake_response("https://libguides.example.edu/libguides/guide_process.php"),
+    ]
+
+    page = FakeLayoutPage(["System Default - Tab Layout", "System Default - Tab Layout"], responses)
+    status = migrate_guide(page, {"id": 1}, rules, cache, dry_run=False)
+    assert "❌" in status
+    assert cache.get(1) is None
+
+    page = FakeLayoutPage(["System Default - Tab Layout", "Caltech Library - Guides - Tab Layout"], responses)
+    assert "✨" in migrate_guide(page, {"id": 2}, rules, cache, dry_run=False)
+    assert cache.get(2) == "Caltech Library - Guides - Tab Layout"
+
+
+def test_empty_layout_is_not_matched(tmp_path):
+    rules = LayoutRules(guides_layout.RULES["update"])
+    page = FakeLayoutPage([None], [])
+    assert migrate_guide(page, {"id": 1}, rules, LayoutCache(tmp_path / "layouts.json"), dry_run=False) == " ❓"
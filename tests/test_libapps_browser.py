@@ -0,0 +1,158 @@
+import json
+import queue
+
+import pytest
+
+import libapps_browser
+
+from libapps_browser import Artifacts, AssetEdit, EditExecutor
+
+
+class FakePage:
+    def __init__(self):
+        self.written = []
+
+    def goto(self, url):
+        pass
+
+    def screenshot(self, path=None):
+        if path:
+            self.written.append(path)
+        return b""
+
+
+class FakeContext:
+    def route(self, pattern, handler):
+        pass
+
+    def new_page(self):
+        return FakePage()
+
+    def close(self):
+        pass
+
+
+class FakeBrowser:
+    def new_context(self, **kwargs):
+        return FakeContext()
+
+    def close(self):
+        pass
+
+
+class FakePlaywright:
+    class firefox:
+        @staticmethod
+        def launch():
+            return FakeBrowser()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+@pytest.fixture
+def executor(tmp_path, monkeypatch):
+    monkeypatch.setenv("LIBAPPS_BASE_URL", "http://libapps.example.edu")
+    monkeypatch.setenv("LIBAPPS_ARTIFACTS", "none")
+    monkeypatch.setattr(libapps_browser, "sync_playwright", FakePlaywright)
+
+    def build(apply):
+        return EditExecutor(apply=apply, rate=1000, output_dir=tmp_path)
+
+    return build
+
+
+def test_unexpected_error_is_recorded_and_worker_continues(executor):
+    def apply(page, edit, dry_run, artifacts):
+        if edit.asset_id == 2:
+            raise KeyError("type_id")
+        return "saved"
+
+    executor = executor(apply)
+    edits = queue.Queue()
+    for asset_id in (1, 2, 3):
+        edits.put(AssetEdit(asset_id, "Link", toggle_proxy="No"))
+    executor.worker(0, edits, storage_state={})
+
+    results = {r["asset_id"]: r for r in executor.results}
+    assert [results[i]["status"] for i in (1, 2, 3)] == ["saved", "failed", "saved"]
+    assert results[2]["error"] == "KeyError: 'type_id'"
+    assert results[2]["attempts"] == 1
+    assert "KeyError" in results[2]["traceback"]
+    with open(executor.results_path) as f:
+        journal = [json.loads(line) for line in f]
+    assert [e["status"] for e in journal if e["asset_id"] == 2] == ["failed"]
+
+
+def sampled_items(attempts, sample_every, tmp_path):
+    """Numbers of the items whose screenshots are written, for items with the given attempt counts."""
+    artifacts = Artifacts(tmp_path, policy="sampled", sample_every=sample_every)
+    page = FakePage()
+    for item, item_attempts in enumerate(attempts, start=1):
+        for attempt in range(1, item_attempts + 1):
+            artifacts.start(attempt)
+            artifacts.screenshot(page, f"{item}-{attempt}")
+    return sorted({int(path.rsplit("/", 1)[-1].split("-")[0]) for path in page.written})
+
+
+def test_sample_every_item(tmp_path):
+    assert sampled_items([1, 1, 1, 1], 1, tmp_path) == [1, 2, 3, 4]
+
+
+def test_sampling_counts_items_not_attempts(tmp_path):
+    assert sampled_items([1, 1, 1], 2, tmp_path) == [1, 3]
+    assert sampled_items([3, 1, 1, 2, 1], 2, tmp_path) == [1, 3, 5]
+
+
+class FailingPlaywright(FakePlaywright):
+    class firefox:
+        @staticmethod
+        def launch():
+            raise RuntimeError("browser failed to launch")
+
+
+def test_worker_that_cannot_launch_journals_its_edits(executor, monkeypatch):
+    monkeypatch.setattr(libapps_browser, "sync_playwright", FailingPlaywright)
+    executor = executor(lambda page, edit, dry_run, artifacts: "saved")
+    edits = queue.Queue()
+    for asset_id in (1, 2):
+        edits.put(AssetEdit(asset_id, "Link", toggle_proxy="No"))
+    executor.worker(0, edits, storage_state={})
+
+    assert [(r["asset_id"], r["status"]) for r in executor.results] == [(1, "failed"), (2, "failed")]
+    assert executor.results[0]["error"] == "RuntimeError: browser failed to launch"
+    with open(executor.results_path) as f:
+        assert [json.loads(line)["status"] for line in f] == ["failed", "failed"]
+
+
+class FakeSessionContext:
+    def __init__(self, cookies, status=200):
+        self.cookie_list = cookies
+        self.request = self
+        self.status = status
+        self.url = "http://libapps.example.edu/libguides/assets.php"
+        self.requested = False
+
+    def cookies(self):
+        return self.cookie_list
+
+    def get(self, path, max_redirects=None):
+        self.requested = True
+        return self
+
+
+def test_session_ignores_expired_cookies_of_other_hosts(monkeypatch):
+    monkeypatch.setenv("LIBAPPS_BASE_URL", "http://libapps.example.edu")
+    session = {"name": "lasid", "domain": "libapps.example.edu", "expires": -1}
+    analytics = {"name": "_ga", "domain": ".google-analytics.com", "expires": 1}
+    context = FakeSessionContext([session, analytics])
+    assert libapps_browser.session_is_valid(context)
+    assert context.requested
+
+    expired = FakeSessionContext([{**session, "expires": 1}, analytics])
+    assert not libapps_browser.session_is_valid(expired)
+    assert not expired.requested
+    assert not libapps_browser.session_is_valid(FakeSessionContext([analytics]))
@@ -0,0 +1,94 @@
+import requests
+
+from libguides_api import LibGuidesAPI
+
+
+def test_cache_key_depends_on_site(tmp_path):
+    site_a = LibGuidesAPI(site_id="1", key="a", cache_dir=tmp_path)
+    site_b = LibGuidesAPI(site_id="2", key="a", cache_dir=tmp_path)
+    rotated_key = LibGuidesAPI(site_id="1", key="b", cache_dir=tmp_path)
+    params = {"expand": "owner"}
+    assert site_a.cache_paths("guides", params) != site_b.cache_paths("guides", params)
+    assert site_a.cache_paths("guides", params) == rotated_key.cache_paths("guides", params)
+
+
+class FakeGuidesAPI(LibGuidesAPI):
+    """Answers `guides/{ids}` like the API: 404 if any of the IDs is unknown."""
+
+    def __init__(self, known, tmp_path):
+        super().__init__(site_id="1", key="a", cache_dir=tmp_path)
+        self.known = known
+        self.calls = []
+
+    def get(self, endpoint, **params):
+        self.calls.append(endpoint)
+        ids = endpoint.split("/", 1)[1].split(",")
+        if any(int(i) not in self.known for i in ids):
+            response = requests.Response()
+            response.status_code = 404
+            raise requests.HTTPError("404 Client Error", response=response)
+        return [{"id": int(i), "name": f"Guide {i}"} for i in ids]
+
+
+def test_guides_by_id_leaves_out_unknown_ids(tmp_path):
+    api = FakeGuidesAPI({1, 2, 4, 5, 6}, tmp_path)
+    guides = api.guides(guide_ids="1,2,3,4,5,6", fields=["id"], chunk_size=4)
+    assert sorted(g["id"] for g in guides) == [1, 2, 4, 5, 6]
+
+
+def test_guides_without_ids_makes_no_request(tmp_path):
+    api = FakeGuidesAPI(set(), tmp_path)
+    assert api.guides(guide_ids=[]) == []
+    assert api.calls == []
+
+
+class FakeResponse:
+    def __init__(self, status_code, body=b"", headers=None):
+        self.status_code = status_code
+        self.body = body
+        self.headers = headers or {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size):
+        # NOTE trailing whitespace after the array, like a chunked response
+        for i in range(0, len(self.body), 4):
+            yield self.body[i:i + 4]
+        yield b"\n"
+
+
+class FakeLimiter:
+    def acquire(self):
+        pass
+
+    def success(self):
+        pass
+
+
+class FakeSession:
+    """Answers with an ETag, and with 304 when the request has a matching `If-None-Match`."""
+
+    def __init__(self):
+        self.requests = []
+
+    def get(self, url, headers=None, **kwargs):
+        self.requests.append(headers)
+        if (headers or {}).get("If-None-Match") == '"v1"':
+            return FakeResponse(304)
+        return FakeResponse(200, b'[{"id": 1}, {"id": 2}]', {"ETag": '"v1"'})
+
+
+def test_streamed_response_is_cached_and_revalidated(tmp_path):
+    api = LibGuidesAPI(site_id="1", key="a", cache_dir=tmp_path, limiter=FakeLimiter())
+    api.session = FakeSession()
+    assert list(api.iter_assets()) == [{"id": 1}, {"id": 2}]
+    assert not list(tmp_path.glob("*.partial"))
+    assert list(api.iter_assets()) == [{"id": 1}, {"id": 2}]
+    assert api.session.requests[1] == {"If-None-Match": '"v1"'}
@@ -0,0 +1,17 @@
+from links import LinkIndex, normalize_url
+
+
+def test_notation_variants_match():
+    assert normalize_url("HTTPS://Example.com:443/a/b/#top") == normalize_url("https://example.com/a/b")
+    assert normalize_url("https://example.com/%7Euser/%e2%82%ac") == normalize_url("https://example.com/~user/%E2%82%AC")
+
+
+def test_encoded_reserved_characters_do_not_match():
+    assert normalize_url("https://example.com/x%2Fy") != normalize_url("https://example.com/x/y")
+    assert normalize_url("https://example.com/?a=1%26b=2") != normalize_url("https://example.com/?a=1&b=2")
+
+
+def test_index_does_not_match_decoded_slash():
+    index = LinkIndex([{"id": 1, "url": "https://example.com/x/y"}])
+    assert index.resolve("https://example.com/x%2Fy") == []
+    assert index.resolve("https://EXAMPLE.com/x/y/") == [1]
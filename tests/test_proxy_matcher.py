@@ -0,0 +1,22 @@
+import pytest
+
+from proxy_matcher import ProxyMatcher
+
+PREFIX = "https://proxy.example.edu/login?url="
+
+
+def test_exception_domain_entries_match_by_hostname():
+    matcher = ProxyMatcher([], ["Example.com:8443", " https://other.example.org/ ", ""])
+    assert matcher.match_exception_domain("https://www.example.com/a") == "example.com"
+    assert matcher.match_exception_domain("http://other.example.org:8080/") == "other.example.org"
+    assert matcher.match_exception_domain("https://example.net/example.com") is None
+
+
+def test_exception_domain_with_path_is_rejected():
+    with pytest.raises(SystemExit):
+        ProxyMatcher([], ["example.com/path"])
+
+
+def test_prefixes_are_stripped():
+    matcher = ProxyMatcher([f" {PREFIX}", ""], [])
+    assert matcher.classify_one(f"{PREFIX}https://example.com/").prefix == PREFIX
@@ -0,0 +1,80 @@
+import asyncio
+import importlib.util
+import subprocess
+
+from pathlib import Path
+
+import pytest
+
+spec = importlib.util.spec_from_file_location("transcode", Path(__file__).parents[1] / "transcode-to-FFV1.py")
+transcode = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(transcode)
+
+
+class FakeSupervisor:
+    """Stands in for ffmpeg, ffprobe and md5sum; the source checksum is the last to finish."""
+
+    def __init__(self, source_md5):
+        self.source_md5 = source_md5
+
+    async def execute(self, stage, cmd):
+        stdout = ""
+        if stage == "probe":
+            stdout = "0\n" if cmd[-2] != "s" else ""
+        elif stage == "transcode":
+            Path(cmd[-1]).write_bytes(b"mkv")
+        elif stage == "md5sum" and not cmd[-1].endswith(".mkv"):
+            await asyncio.sleep(0.05)
+            stdout = f"{self.source_md5}  {cmd[-1]}"
+        elif stage == "md5sum":
+            stdout = f"mkvmd5  {cmd[-1]}"
+        elif stage == "streamhash":
+            stdout = "0,v,MD5=video\n"
+        return subprocess.CompletedProcess(cmd, 0, stdout, "")
+
+
+@pytest.fixture
+def pipeline(tmp_path, monkeypatch):
+    source_root = tmp_path / "src"
+    destination_root = tmp_path / "dst"
+    source = source_root / "item" / "item_PM.mov"
+    source.parent.mkdir(parents=True)
+    source.write_bytes(b"source")
+    Path(f"{source}.md5").write_text("sourcemd5  item_PM.mov\n")
+
+    async def probe_source(filepath):
+        return {}
+
+    async def get_audio_stream_codecs(filepath, ffprobe_cmd):
+        return []
+
+    monkeypatch.setattr(transcode, "probe_source", probe_source)
+    monkeypatch.setattr(transcode, "get_audio_stream_codecs", get_audio_stream_codecs)
+    for name, value in {
+        "FFMPEG_CMD": "ffmpeg",
+        "FFPROBE_CMD": "ffprobe",
+        "RUN_CONTEXT": {"ffmpeg": {"version": "ffmpeg version test"}, "items": []},
+        "RUN_CONTEXT_PATH": destination_root / "RUN.json",
+    }.items():
+        monkeypatch.setattr(transcode, name, value, raising=False)
+
+    def run(source_md5):
+        monkeypatch.setattr(transcode, "SUPERVISOR", FakeSupervisor(source_md5))
+        item = {}
+        asyncio.run(transcode.transcode_pipeline(source, source_root, destination_root, item))
+        return item
+
+    run.mkv_md5_path = transcode.build_destination_paths(source, source_root, destination_root)[1]
+    return run
+
+
+def test_mkv_md5_is_written_after_source_md5_matches(pipeline):
+    item = pipeline("sourcemd5")
+    assert item["mkv_md5"] == "mkvmd5"
+    assert pipeline.mkv_md5_path.read_text() == "mkvmd5"
+
+
+def test_no_mkv_md5_when_source_md5_fails(pipeline):
+    with pytest.raises(transcode.StageFailed):
+        pipeline("othermd5")
+    assert not pipeline.mkv_md5_path.exists()
@@ -1,19 +1,21 @@
 # transcode-to-FFV1.py
-# Version 1.7.4
+# Version 1.8.0
 
 import argparse
+import asyncio
 import atexit
 import datetime
-import itertools
+import json
+import os
+import platform
+import re
 import shutil
 import signal
 import subprocess
 import sys
 import time
-import threading
 
 from pathlib import Path
-from typing import List, Optional
 
 # Define video extensions globally for DRY usage
 VIDEO_EXTS = [
@@ -25,87 +27,219 @@ def restore_tty():
 
 atexit.register(restore_tty)
 
-def auto_cleanup_processes(func):
-    """Decorator that ensures subprocess cleanup on exit"""
-    processes = []
-    original_popen = None  # Declare in outer scope
+# Default scheduling for each pipeline stage. `nice` is added to the process
+# niceness, `ionice` is an I/O class name with an optional best-effort level
+# (e.g. "best-effort:7"), `cpus` is a CPU list for affinity (e.g. "0-3,6"), and
+# `cpu_weight`/`io_weight` are cgroup v2 weights applied only with `--cgroups`.
+STAGE_PRIORITIES = {
+    "probe": {"nice": 0, "ionice": None, "cpus": None, "cpu_weight": None, "io_weight": None},
+    "subtitle_check": {"nice": 5, "ionice": "best-effort:4", "cpus": None, "cpu_weight": None, "io_weight": None},
+    "transcode": {"nice": 0, "ionice": "best-effort:0", "cpus": None, "cpu_weight": 1000, "io_weight": 1000},
+    "streamhash": {"nice": 10, "ionice": "best-effort:7", "cpus": None, "cpu_weight": 100, "io_weight": 100},
+    "md5sum": {"nice": 15, "ionice": "best-effort:7", "cpus": None, "cpu_weight": 50, "io_weight": 50},
+}
+
+IONICE_CLASSES = {"realtime": "1", "best-effort": "2", "idle": "3"}
+
+
+def parse_cpu_list(cpus: str):
+    cpu_set = set()
+    for part in cpus.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            start, end = part.split("-", 1)
+            cpu_set.update(range(int(start), int(end) + 1))
+        else:
+            cpu_set.add(int(part))
+    return cpu_set
 
-    def cleanup():
-        for proc in processes:
-            if proc.poll() is None:
+
+def parse_priority_override(value: str):
+    """Parse a `--priority` value such as `md5sum=nice=19,ionice=idle,cpus=0-1`."""
+    stage, _, settings = value.partition("=")
+    if stage not in STAGE_PRIORITIES or not settings:
+        raise argparse.ArgumentTypeError(
+            f"expected STAGE=KEY=VALUE[,KEY=VALUE...] with STAGE one of {', '.join(STAGE_PRIORITIES)}"
+        )
+    overrides = {}
+    # NOTE cpu lists contain commas, so split on commas that start a new key
+    for item in re.split(r",(?=[a-z_]+=)", settings):
+        key, _, setting = item.partition("=")
+        if key not in STAGE_PRIORITIES[stage]:
+            raise argparse.ArgumentTypeError(f"unknown priority setting for {stage}: {key}")
+        if key in {"nice", "cpu_weight", "io_weight"}:
+            overrides[key] = int(setting)
+        elif key == "ionice" and setting.split(":")[0] not in IONICE_CLASSES:
+            raise argparse.ArgumentTypeError(f"unknown ionice class: {setting}")
+        else:
+            overrides[key] = setting or None
+    return stage, overrides
+
+
+class ProcessSupervisor:
+    """Start pipeline stage processes with per-stage scheduling and clean up their process groups."""
+
+    def __init__(self, priorities=None, use_cgroups=False):
+        self.priorities = {stage: dict(settings) for stage, settings in (priorities or STAGE_PRIORITIES).items()}
+        self.use_cgroups = use_cgroups and shutil.which("systemd-run") is not None
+        self.has_ionice = shutil.which("ionice") is not None
+        self.processes = []
+
+    def configure(self, stage, **settings):
+        self.priorities[stage].update(settings)
+
+    def build_command(self, stage, cmd):
+        settings = self.priorities[stage]
+        prefix = []
+        if self.use_cgroups and (settings["cpu_weight"] or settings["io_weight"]):
+            prefix += ["systemd-run", "--user", "--scope", "--quiet", "--collect"]
+            if settings["cpu_weight"]:
+                prefix += ["-p", f"CPUWeight={settings['cpu_weight']}"]
+            if settings["io_weight"]:
+                prefix += ["-p", f"IOWeight={settings['io_weight']}"]
+        if self.has_ionice and settings["ionice"]:
+            io_class, _, io_level = settings["ionice"].partition(":")
+            prefix += ["ionice", "-c", IONICE_CLASSES[io_class]]
+            if io_level and io_class != "idle":
+                prefix += ["-n", io_level]
+        return prefix + list(cmd)
+
+    def preexec(self, stage):
+        settings = self.priorities[stage]
+
+        def apply_scheduling():
+            if settings["nice"]:
+                os.nice(settings["nice"])
+            if settings["cpus"] and hasattr(os, "sched_setaffinity"):
+                os.sched_setaffinity(0, parse_cpu_list(settings["cpus"]))
+
+        return apply_scheduling
+
+    async def execute(self, stage, cmd):
+        """Run `cmd` as `stage` in its own process group and return its captured text output."""
+        proc = await asyncio.create_subprocess_exec(
+            *self.build_command(stage, cmd),
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            preexec_fn=self.preexec(stage),
+            start_new_session=True,
+        )
+        self.processes.append(proc)
+        try:
+            stdout, stderr = await proc.communicate()
+        finally:
+            # NOTE also reached when the stage is cancelled by a failing stage
+            await self.stop(proc)
+        return subprocess.CompletedProcess(
+            cmd, proc.returncode, stdout.decode(errors="replace"), stderr.decode(errors="replace")
+        )
+
+    async def stop(self, proc, timeout=2):
+        """Stop the whole process group of `proc`, escalating to SIGKILL."""
+        if proc.returncode is None:
+            try:
+                os.killpg(proc.pid, signal.SIGTERM)
+                await asyncio.wait_for(proc.wait(), timeout)
+            except asyncio.TimeoutError:
+                os.killpg(proc.pid, signal.SIGKILL)
+                await proc.wait()
+            except (ProcessLookupError, OSError):
+                pass
+        if proc in self.processes:
+            self.processes.remove(proc)
+
+    def cleanup(self):
+        """Kill any process groups still running; used at exit and on SIGINT."""
+        for proc in list(self.processes):
+            if proc.returncode is None:
                 try:
-                    proc.terminate()
-                    proc.wait(timeout=2)
-                except subprocess.TimeoutExpired:
-                    proc.kill()
-                    proc.wait()
+                    os.killpg(proc.pid, signal.SIGKILL)
                 except (ProcessLookupError, OSError):
                     pass
+            self.processes.remove(proc)
 
-    def patched_popen(*args, **kwargs):
-        # Use the original Popen to avoid recursion
-        if original_popen is None:
-            raise RuntimeError("subprocess.Popen patching failed")
-        proc = original_popen(*args, **kwargs)
-        processes.append(proc)
-        return proc
 
-    def wrapper(*args, **kwargs):
-        # Setup cleanup
-        atexit.register(cleanup)
-        signal.signal(signal.SIGINT, lambda s, f: (cleanup(), exit(0)))
+SUPERVISOR = ProcessSupervisor()
+
 
-        # Store original Popen and patch it
-        nonlocal original_popen
-        original_popen = subprocess.Popen
-        subprocess.Popen = patched_popen
+def supervised(func):
+    """Decorator that stops any stage processes still running when func exits"""
 
+    def wrapper(*args, **kwargs):
         try:
             return func(*args, **kwargs)
         finally:
-            subprocess.Popen = original_popen  # Restore original
-            cleanup()
+            SUPERVISOR.cleanup()
 
     return wrapper
 
 
-class Spinner:
-    # https://stackoverflow.com/a/57974583
+def handle_sigint(signum, frame):
+    SUPERVISOR.cleanup()
+    raise KeyboardInterrupt
+
+
+class StageFailed(Exception):
+    """Raised by a pipeline stage to stop every other stage of the item."""
+
 
-    __default_spinner_symbols_list = ['.    ', '..   ', '...  ', '.... ', '.....', ' ....', '  ...', '   ..', '    .', '     ']
+class StageGraph:
+    """Run async stages as soon as the stages they depend on have finished."""
 
-    def __init__(self, spinner_symbols_list: Optional[List[str]] = None):
-        spinner_symbols_list = spinner_symbols_list if spinner_symbols_list else Spinner.__default_spinner_symbols_list
-        self.__screen_lock = threading.Event()
-        self.__spinner = itertools.cycle(spinner_symbols_list)
-        self.__stop_event = False
-        self.__thread = None
+    def __init__(self):
+        self.stages = {}
+        self.timings = {}
 
-    def get_spin(self):
-        return self.__spinner
+    def stage(self, name, after=()):
+        """Decorator registering a stage; it is called with the results of `after` as keyword arguments."""
 
-    def start(self, spinner_message: str):
-        self.__stop_event = False
-        time.sleep(0.3)
+        def register(func):
+            self.stages[name] = (func, tuple(after))
+            return func
 
-        def run_spinner(message):
-            while not self.__stop_event:
-                print("\r{message} {spinner}".format(message=message, spinner=next(self.__spinner)), end="")
-                time.sleep(0.3)
+        return register
 
-            self.__screen_lock.set()
+    async def run(self):
+        tasks = {}
 
-        self.__thread = threading.Thread(target=run_spinner, args=(spinner_message,), daemon=True)
-        self.__thread.start()
+        async def run_stage(name):
+            func, after = self.stages[name]
+            results = {dependency: await tasks[dependency] for dependency in after}
+            started = time.monotonic()
+            result = await func(**results)
+            self.timings[name] = round(time.monotonic() - started, 3)
+            return result
+
+        for name in self.stages:
+            tasks[name] = asyncio.create_task(run_stage(name), name=name)
+        try:
+            done, _ = await asyncio.wait(tasks.values(), return_when=asyncio.FIRST_EXCEPTION)
+            for task in done:
+                if task.exception():
+                    raise task.exception()
+        finally:
+            # fail fast: cancelling a stage stops its process group
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+        return {name: task.result() for name, task in tasks.items()}
 
-    def stop(self):
-        self.__stop_event = True
-        if self.__screen_lock.is_set():
-            self.__screen_lock.wait()
-            self.__screen_lock.clear()
-            print("\r", end="")
 
-        print()
+class OrderedLog:
+    """Append sections to a log file in a fixed order as stages finish in any order."""
+
+    def __init__(self, path: Path, order):
+        self.path = path
+        self.order = list(order)
+        self.sections = {}
+
+    def add(self, name, text=""):
+        self.sections[name] = text
+        with open(self.path, "a") as f:
+            while self.order and self.order[0] in self.sections:
+                f.write(self.sections.pop(self.order.pop(0)))
 
 
 def has_aac_audio_stream(filepath, ffprobe_cmd):
@@ -125,8 +259,9 @@ def has_aac_audio_stream(filepath, ffprobe_cmd):
     return "aac" in codecs
 
 
-def get_audio_stream_codecs(filepath, ffprobe_cmd):
-    result = subprocess.run(
+async def get_audio_stream_codecs(filepath, ffprobe_cmd):
+    result = await SUPERVISOR.execute(
+        "probe",
         [
             ffprobe_cmd,
             "-v",
@@ -139,8 +274,6 @@ def get_audio_stream_codecs(filepath, ffprobe_cmd):
             "csv=p=0",
             filepath,
         ],
-        capture_output=True,
-        text=True,
     )
     return [line.strip().lower() for line in result.stdout.splitlines() if line.strip()]
 
@@ -221,95 +354,192 @@ def copy_item_siblings(processed_video_path: Path, source_root: Path, destinatio
         else:
             shutil.copy2(source_path, destination_path)
 
-@auto_cleanup_processes
-def main(p: Path, source_root: Path, destination_root: Path):
+# FFV1 version 3 with one GOP per frame and slice CRCs, FLAC audio; data streams dropped
+ENCODE_PROFILE = {
+    "name": "FFV1 level 3 / FLAC",
+    "video_codec": "ffv1",
+    "audio_codec": "flac",
+    "ffmpeg_args": [
+        "-map", "0",
+        "-c:v", "ffv1", "-level", "3", "-g", "1", "-slicecrc", "1", "-slices", "4",
+        "-c:a", "flac", "-compression_level", "12",
+        "-dn",
+    ],
+}
+
+# ffv1 encodes its slices in parallel, so each encode keeps about this many cores busy
+ENCODE_THREADS = 4
+
+RUN_CONTEXT_FILENAME = "RUN.json"
+
+# media seconds per wall-clock second assumed by `--plan` without previous runs to calibrate from
+DEFAULT_REALTIME_FACTOR = 1.0
+
+
+def describe_binary(cmd):
+    version_output = subprocess.run([cmd, "-version"], capture_output=True, text=True).stdout.strip()
+    lines = version_output.splitlines()
+    configuration = next((line.split(":", 1)[1].strip() for line in lines if line.startswith("configuration:")), "")
+    return {
+        "path": cmd,
+        "version": lines[0] if lines else "",
+        "configuration": configuration,
+        "version_output": version_output,
+    }
+
+
+def capture_run_context(args, batches_directory: Path):
+    """Collect facts shared by every file in the batch; captured once per invocation."""
+    return {
+        "run_id": batches_directory.name,
+        "started": datetime.datetime.now().isoformat(timespec="seconds"),
+        "command": sys.argv,
+        "level": args.level,
+        "src": Path(args.src).resolve().as_posix(),
+        "dst": batches_directory.resolve().as_posix(),
+        "ffmpeg": describe_binary(args.ffmpeg),
+        "ffprobe": describe_binary(args.ffprobe),
+        "host": {
+            "hostname": platform.node(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count(),
+            "python": platform.python_version(),
+        },
+        "encode_profile": ENCODE_PROFILE,
+        "stage_priorities": SUPERVISOR.priorities,
+        "jobs": args.jobs,
+        "items": [],
+    }
+
+
+def write_run_context():
+    """Rewrite the batch run context JSON; called after every item so partial runs are recorded."""
+    RUN_CONTEXT["updated"] = datetime.datetime.now().isoformat(timespec="seconds")
+    temporary_path = RUN_CONTEXT_PATH.with_suffix(".json.tmp")
+    with open(temporary_path, "w") as f:
+        json.dump(RUN_CONTEXT, f, indent=2)
+    temporary_path.replace(RUN_CONTEXT_PATH)
+
+
+async def count_streams(filepath, stream_type):
+    result = await SUPERVISOR.execute(
+        "probe",
+        [
+            FFPROBE_CMD,
+            "-v",
+            "error",
+            "-select_streams",
+            stream_type,
+            "-show_entries",
+            "stream=index",
+            "-of",
+            "csv=p=0",
+            filepath,
+        ],
+    )
+    return len(result.stdout.split())
+
+
+def streamhash_cmd(filepath):
+    return [
+        FFMPEG_CMD,
+        "-i",
+        filepath,
+        "-map",
+        "0:v",
+        "-map",
+        "0:a",
+        "-f",
+        "streamhash",
+        "-hash",
+        "md5",
+        "-",
+    ]
+
+
+async def transcode_pipeline(p: Path, source_root: Path, destination_root: Path, item: dict):
+    """Transcode one source file, recording its per-file facts in `item`."""
     output_mkv_path, output_mkv_md5_path, transcode_log_path = build_destination_paths(p, source_root, destination_root)
     output_mkv_path.parent.mkdir(parents=True, exist_ok=True)
     source_md5_path = Path(f"{p.as_posix()}.md5")
     error_log_path = transcode_log_path.with_name(f"{transcode_log_path.stem}--ERROR.md")
 
     print(f"\n📂 {p.parent.name}")
-    video_stream_count = len(
-        subprocess.run(
-            [
-                FFPROBE_CMD,
-                "-v",
-                "error",
-                "-select_streams",
-                "v",
-                "-show_entries",
-                "stream=index",
-                "-of",
-                "csv=p=0",
-                p.as_posix(),
-            ],
-            capture_output=True,
-            text=True,
-        ).stdout.split()
-    )
-    print(f"🎥 {p.name} contains {video_stream_count} video streams")
-    audio_stream_count = len(
-        subprocess.run(
-            [
-                FFPROBE_CMD,
-                "-v",
-                "error",
-                "-select_streams",
-                "a",
-                "-show_entries",
-                "stream=index",
-                "-of",
-                "csv=p=0",
-                p.as_posix(),
-            ],
-            capture_output=True,
-            text=True,
-        ).stdout.split()
-    )
-    print(f"🎧 {p.name} contains {audio_stream_count} audio streams")
-    subtitle_stream_count = len(
-        subprocess.run(
-            [
-                FFPROBE_CMD,
-                "-v",
-                "error",
-                "-select_streams",
-                "s",
-                "-show_entries",
-                "stream=index",
-                "-of",
-                "csv=p=0",
-                p.as_posix(),
-            ],
-            capture_output=True,
-            text=True,
-        ).stdout.split()
-    )
-    print(f"🔇 {p.name} contains {subtitle_stream_count} subtitle streams")
     with open(transcode_log_path, "w") as f:
         f.write(
             "# TRANSCODING LOG\n\nThese were the steps used to convert the source file to a lossless FFV1/MKV file.\n\n"
         )
-    """Start long-running processes at the same time in the background."""
-    print("\n")
-    calculating_md5_source_file = None
-    if source_md5_path.exists():
+    log = OrderedLog(transcode_log_path, ["source_md5", "ffmpeg_version", "transcode", "mkv_md5", "streamhash"])
+    log.add(
+        "ffmpeg_version",
+        "FFmpeg version used to transcode the file. The full version output, build configuration, host details and encode profile are recorded in the batch run metadata.\n"
+        f"```\n$ {FFMPEG_CMD} -version | head -n 1\n{RUN_CONTEXT['ffmpeg']['version']}\n```\n\n"
+        f"Batch run metadata: `{os.path.relpath(RUN_CONTEXT_PATH, transcode_log_path.parent)}`\n\n",
+    )
+    item.update(
+        {
+            "output": output_mkv_path.relative_to(RUN_CONTEXT_PATH.parent).as_posix(),
+            "transcode_log": transcode_log_path.relative_to(RUN_CONTEXT_PATH.parent).as_posix(),
+            "source_size": p.stat().st_size,
+            "storage": storage_key(p),
+        }
+    )
+    graph = StageGraph()
+
+    @graph.stage("probe")
+    async def probe():
+        video_stream_count, audio_stream_count, subtitle_stream_count, item["media"] = await asyncio.gather(
+            count_streams(p.as_posix(), "v"),
+            count_streams(p.as_posix(), "a"),
+            count_streams(p.as_posix(), "s"),
+            probe_source(p.as_posix()),
+        )
+        print(f"🎥 {p.name} contains {video_stream_count} video streams")
+        print(f"🎧 {p.name} contains {audio_stream_count} audio streams")
+        print(f"🔇 {p.name} contains {subtitle_stream_count} subtitle streams")
+        item["streams"] = {"v": video_stream_count, "a": audio_stream_count, "s": subtitle_stream_count}
+        return item["streams"]
+
+    @graph.stage("source_md5")
+    async def source_md5():
+        if not source_md5_path.exists():
+            log.add("source_md5")
+            return None
         # calculate MD5 of source file if a comparison file exists
         print("⏳ calculating source file MD5 in the background")
-        calculating_md5_source_file = subprocess.Popen(
-            ["md5sum", p.as_posix()],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
+        with open(source_md5_path) as f:
+            saved_md5_source_file = f.read().split()[0].lower()
+        calculated_md5_source_file = (await SUPERVISOR.execute("md5sum", ["md5sum", p.as_posix()])).stdout.split()[0]
+        # compare calculated MD5 of source file with saved MD5 checksum file
+        print(f"{p.name}:        {calculated_md5_source_file}")
+        print(f"{p.name}.md5:    {saved_md5_source_file}")
+        if calculated_md5_source_file != saved_md5_source_file:
+            print("❌ MD5 FILE MISMATCH")
+            raise StageFailed("MD5 file mismatch")
+        print("✅ MD5 FILE MATCH")
+        item["source_md5"] = calculated_md5_source_file
+        log.add(
+            "source_md5",
+            "Calculated the MD5 checksum of the source file and compared it with the saved MD5 checksum.\n\n"
+            "Calculated MD5:\n"
+            f"```\n$ md5sum {p.name}\n{calculated_md5_source_file}  {p.name}\n```\n\n"
+            "Saved MD5:\n"
+            f"```\n$ cat {p.name}.md5\n{saved_md5_source_file}  {p.name}.md5\n```\n\n",
         )
-    # determine if first subtitle stream has content
-    if subtitle_stream_count > 1:
-        print("🔇 multiple subtitle streams detected; skipping subtitle transcoding")
-        # set up option to skip transcoding subtitle streams
-        skip_subtitle_streams = True
-    elif subtitle_stream_count > 0:
+        return calculated_md5_source_file
+
+    @graph.stage("subtitle_check", after=["probe"])
+    async def subtitle_check(probe):
+        # determine if first subtitle stream has content; returns whether to skip subtitle streams
+        if probe["s"] > 1:
+            print("🔇 multiple subtitle streams detected; skipping subtitle transcoding")
+            return True
+        if probe["s"] == 0:
+            return True
         print("⏳ checking for subtitle streams with content in the background")
-        captured_subtitle_stream = subprocess.run(
+        captured_subtitle_stream = await SUPERVISOR.execute(
+            "subtitle_check",
             [
                 FFMPEG_CMD,
                 "-f",
@@ -324,243 +554,346 @@ def main(p: Path, source_root: Path, destination_root: Path):
                 "srt",
                 "-",
             ],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
         )
         if captured_subtitle_stream.stdout == "":
             print("🔇 subtitle stream has no content")
-            # set up option to skip transcoding subtitle streams
-            skip_subtitle_streams = True
-        else:
-            print("🔇 subtitle stream has content")
-            skip_subtitle_streams = False
-    else:
-        # set up option to skip transcoding subtitle streams
-        skip_subtitle_streams = True
-    # calculate MD5 of source audio/video streams
-    print("⏳ calculating source streamhash as MD5 in the background")
-    calculating_md5_source_streams = subprocess.Popen(
-        [
+            return True
+        print("🔇 subtitle stream has content")
+        return False
+
+    @graph.stage("source_streamhash")
+    async def source_streamhash():
+        # calculate MD5 of source audio/video streams
+        print("⏳ calculating source streamhash as MD5 in the background")
+        result = await SUPERVISOR.execute("streamhash", streamhash_cmd(p.as_posix()))
+        if result.returncode != 0:
+            print("❌ SOURCE STREAMHASH FAILED")
+            print(result.stderr)
+            raise StageFailed("Source streamhash failed")
+        return result.stdout.strip()
+
+    @graph.stage("source_audio_codecs")
+    async def source_audio_codecs():
+        item["audio_codecs"] = await get_audio_stream_codecs(p.as_posix(), FFPROBE_CMD)
+        return item["audio_codecs"]
+
+    @graph.stage("transcode", after=["subtitle_check"])
+    async def transcode(subtitle_check):
+        # transcode source to FFV1 MKV
+        print(f"⏳ transcoding source to {output_mkv_path.name} in the background")
+        transcode_cmd = [
             FFMPEG_CMD,
+            "-hide_banner",
+            "-nostats",
             "-i",
             p.as_posix(),
-            "-map",
-            "0:v",
-            "-map",
-            "0:a",
-            "-f",
-            "streamhash",
-            "-hash",
-            "md5",
-            "-",
-        ],
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        text=True,
-    )
-    # transcode source to FFV1 MKV
-    print(f"⏳ transcoding source to {output_mkv_path.name} in the background")
-    transcode_cmd = [
-        FFMPEG_CMD,
-        "-hide_banner",
-        "-nostats",
-        "-i",
-        p.as_posix(),
-        "-map",
-        "0",
-        "-c:v",
-        "ffv1",
-        "-level",
-        "3",
-        "-g",
-        "1",
-        "-slicecrc",
-        "1",
-        "-slices",
-        "4",
-        "-c:a",
-        "flac",
-        "-compression_level",
-        "12",
-        "-dn",
-    ]
-    if skip_subtitle_streams:
-        transcode_cmd.append("-sn")
-    transcode_cmd.append(output_mkv_path.as_posix())
-    transcode = subprocess.Popen(
-        transcode_cmd,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        text=True,
-    )
-    if source_md5_path.exists():
-        with open(source_md5_path) as f:
-            saved_md5_source_file = f.read().split()[0].lower()
-        # wait for source file MD5 calculation to complete
-        if calculating_md5_source_file is None:
-            raise SystemExit("Source file MD5 process did not start")
-        spinner = Spinner()
-        spinner.start("🤼 WAITING FOR MD5 COMPARISON TO COMPLETE")
-        calculated_md5_source_file = calculating_md5_source_file.communicate()[0].split()[0]
-        spinner.stop()
-        # compare calculated MD5 of source file with saved MD5 checksum file
-        print(f"{p.name}:        {calculated_md5_source_file}")
-        print(f"{p.name}.md5:    {saved_md5_source_file}")
-        if calculated_md5_source_file != saved_md5_source_file:
-            print("❌ MD5 FILE MISMATCH")
-            transcode.terminate()
-            transcode.wait()
-            calculating_md5_source_streams.terminate()
-            calculating_md5_source_streams.wait()
-            raise SystemExit("MD5 file mismatch")
+            *ENCODE_PROFILE["ffmpeg_args"],
+        ]
+        item["skip_subtitle_streams"] = subtitle_check
+        if subtitle_check:
+            transcode_cmd.append("-sn")
+        transcode_cmd.append(output_mkv_path.as_posix())
+        result = await SUPERVISOR.execute("transcode", transcode_cmd)
+        # ffmpeg writes its message output to stderr
+        ffmpeg_output = result.stderr
+        if result.returncode != 0:
+            print("\n❌ FFMPEG TRANSCODE FAILED")
+            print(ffmpeg_output)
+            with open(error_log_path, "w") as f:
+                f.write(f"# ❌ FFMPEG TRANSCODE FAILED\n\n```\n{ffmpeg_output}\n```\n")
+            raise StageFailed("FFmpeg transcode failed")
+        print(f"✅ TRANSCODED {output_mkv_path.name}")
+        log.add(
+            "transcode",
+            "FFmpeg output.\n"
+            f"```\n$ {FFMPEG_CMD} -hide_banner -nostats -i {p.name} {' '.join(ENCODE_PROFILE['ffmpeg_args'])}{' -sn' if subtitle_check else ''} {output_mkv_path.name}\n{ffmpeg_output}\n```\n\n",
+        )
+
+    @graph.stage("mkv_md5", after=["transcode"])
+    async def mkv_md5(transcode):
+        # calculate MD5 of transcoded MKV file
+        print(f"⏳ calculating {output_mkv_path.name} file MD5 in the background")
+        return (await SUPERVISOR.execute("md5sum", ["md5sum", output_mkv_path.as_posix()])).stdout.split()[0]
+
+    @graph.stage("mkv_md5_file", after=["mkv_md5", "source_md5"])
+    async def mkv_md5_file(mkv_md5, source_md5):
+        # NOTE the MKV checksum is only written once the source checksum has matched
+        calculated_md5_mkv_file = mkv_md5
+        with open(output_mkv_md5_path, "w") as f:
+            f.write(calculated_md5_mkv_file)
+        item["mkv_md5"] = calculated_md5_mkv_file
+        item["output_size"] = output_mkv_path.stat().st_size
+        log.add(
+            "mkv_md5",
+            "Calculated the MD5 checksum of the transcoded MKV file.\n\n"
+            "Calculated MD5:\n"
+            f"```\n$ md5sum {output_mkv_path}\n{calculated_md5_mkv_file}  {output_mkv_path}\n```\n\n",
+        )
+        return calculated_md5_mkv_file
+
+    @graph.stage("mkv_streamhash", after=["transcode"])
+    async def mkv_streamhash(transcode):
+        # calculate MD5 hashes of transcoded MKV audio/video streams
+        print(f"⏳ calculating {output_mkv_path.name} streamhash as MD5 in the background")
+        result = await SUPERVISOR.execute("streamhash", streamhash_cmd(output_mkv_path.as_posix()))
+        if result.returncode != 0:
+            print("❌ MKV STREAMHASH FAILED")
+            print(result.stderr)
+            raise StageFailed("MKV streamhash failed")
+        return result.stdout.strip()
+
+    @graph.stage("compare_streams", after=["source_md5", "source_streamhash", "mkv_streamhash", "source_audio_codecs"])
+    async def compare_streams(source_md5, source_streamhash, mkv_streamhash, source_audio_codecs):
+        # compare MD5 hashes of source audio/video streams with MD5 hashes of transcoded MKV audio/video streams
+        print(f"{p.name} (streams):\n{source_streamhash}")
+        print(f"{output_mkv_path.name} (streams):\n{mkv_streamhash}")
+        source_hashes = parse_streamhash_lines(source_streamhash)
+        mkv_hashes = parse_streamhash_lines(mkv_streamhash)
+        item["source_streamhash"] = source_hashes
+        item["mkv_streamhash"] = mkv_hashes
+
+        if source_hashes["v"] != mkv_hashes["v"]:
+            print("❌ VIDEO STREAM MD5 MISMATCH")
+            raise StageFailed("Video stream MD5 mismatch")
+        print("✅ VIDEO STREAM MD5 MATCH")
+
+        non_aac_audio_positions = [i for i, codec in enumerate(source_audio_codecs) if codec != "aac"]
+
+        if not source_hashes["a"] and not mkv_hashes["a"]:
+            print("✅ NO AUDIO STREAM HASHES TO COMPARE")
+        elif not non_aac_audio_positions:
+            print("ℹ️ SKIPPING AUDIO STREAM MD5 CHECK (all source audio streams are AAC)")
         else:
-            print("✅ MD5 FILE MATCH")
-        with open(transcode_log_path, "a") as f:
-            f.write(
-                "Calculated the MD5 checksum of the source file and compared it with the saved MD5 checksum.\n\n"
-            )
-            f.write("Calculated MD5:\n")
-            f.write(f"```\n$ md5sum {p.name}\n{calculated_md5_source_file}  {p.name}\n```\n\n")
-            f.write("Saved MD5:\n")
-            f.write(f"```\n$ cat {p.name}.md5\n{saved_md5_source_file}  {p.name}.md5\n```\n\n")
-    with open(transcode_log_path, "a") as f:
-        f.write("FFmpeg version used to transcode the file.\n")
-    print_ffmpeg_version = subprocess.run(
-        [
-            FFMPEG_CMD,
-            "-version",
-        ],
-        capture_output=True,
-        text=True,
-    ).stdout.strip()
-    with open(transcode_log_path, "a") as f:
-        f.write(f"```\n$ {FFMPEG_CMD} -version\n{print_ffmpeg_version}\n```\n\n")
-    # wait for transcode to complete; ffmpeg writes its message output to stderr
-    spinner = Spinner()
-    spinner.start("⏳ WAITING FOR TRANSCODING TO COMPLETE")
-    ffmpeg_output = transcode.communicate()[1]
-    spinner.stop()
-    if transcode.returncode != 0:
-        print("\n❌ FFMPEG TRANSCODE FAILED")
-        print(ffmpeg_output)
-        calculating_md5_source_streams.terminate()
-        calculating_md5_source_streams.wait()
-        with open(error_log_path, "w") as f:
-            f.write(f"# ❌ FFMPEG TRANSCODE FAILED\n\n```\n{ffmpeg_output}\n```\n")
-        raise SystemExit("FFmpeg transcode failed")
-    with open(transcode_log_path, "a") as f:
-        f.write("FFmpeg output.\n")
-        f.write(
-            f"```\n$ {FFMPEG_CMD} -hide_banner -nostats -i {p.name} -map 0 -dn -c:v ffv1 -level 3 -g 1 -slicecrc 1 -slices 4 -c:a flac -compression_level 12 {output_mkv_path.name}\n{ffmpeg_output}\n```\n\n"
+            if len(source_hashes["a"]) <= max(non_aac_audio_positions) or len(mkv_hashes["a"]) <= max(non_aac_audio_positions):
+                print("❌ AUDIO STREAM HASH EXTRACTION FAILED")
+                print(f"Source audio codec count: {len(source_audio_codecs)}")
+                print(f"Source non-AAC positions: {non_aac_audio_positions}")
+                print(f"Source audio hash count: {len(source_hashes['a'])}")
+                print(f"MKV audio hash count: {len(mkv_hashes['a'])}")
+                print(f"Source codecs: {source_audio_codecs}")
+                print(f"Source hashes (a): {source_hashes['a']}")
+                print(f"MKV hashes (a): {mkv_hashes['a']}")
+                raise StageFailed("Audio stream hash extraction failed: streamhash output did not include all expected audio streams")
+
+            source_non_aac_hashes = [source_hashes["a"][i] for i in non_aac_audio_positions]
+            mkv_non_aac_hashes = [mkv_hashes["a"][i] for i in non_aac_audio_positions]
+
+            if source_non_aac_hashes != mkv_non_aac_hashes:
+                print("❌ NON-AAC AUDIO STREAM MD5 MISMATCH")
+                raise StageFailed("Non-AAC audio stream MD5 mismatch")
+            print("✅ NON-AAC AUDIO STREAM MD5 MATCH")
+        log.add(
+            "streamhash",
+            "Compared the calculated MD5 stream hashes from the source file with those from the transcoded MKV file. Future stream hash calculations must use the same or a compatible version of FFmpeg, otherwise the output will differ.\n\n"
+            "Source stream hashes:\n"
+            f"```\n$ {FFMPEG_CMD} -i {p.name} -map 0:v -map 0:a -f streamhash -hash md5 -\n{source_streamhash}\n```\n\n"
+            "MKV stream hashes:\n"
+            f"```\n$ {FFMPEG_CMD} -i {output_mkv_path.name} -map 0:v -map 0:a -f streamhash -hash md5 -\n{mkv_streamhash}\n```\n\n",
         )
-    # calculate MD5 of transcoded MKV file
-    print(f"\n⏳ calculating {output_mkv_path.name} file MD5 in the background")
-    calculating_md5_mkv_file = subprocess.Popen(
-        ["md5sum", output_mkv_path.as_posix()],
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        text=True,
-    )
-    # calculate MD5 hashes of transcoded MKV audio/video streams
-    calculated_md5_mkv_streams = subprocess.run(
+
+    print("\n")
+    try:
+        await graph.run()
+    finally:
+        item["stage_seconds"] = graph.timings
+    print("\n✅ DONE\n")
+
+
+async def transcode_item(p: Path, source_root: Path, destination_root: Path):
+    item = {"source": p.relative_to(source_root).as_posix(), "status": "started"}
+    RUN_CONTEXT["items"].append(item)
+    started = time.monotonic()
+    try:
+        await transcode_pipeline(p, source_root, destination_root, item)
+        item["status"] = "done"
+    except BaseException as e:
+        item.update({"status": "failed", "error": str(e) if isinstance(e, StageFailed) else f"{type(e).__name__}: {e}"})
+        raise
+    finally:
+        item["elapsed_seconds"] = round(time.monotonic() - started, 3)
+        write_run_context()
+
+
+async def process_batch(video_paths, source_root: Path, destination_root: Path, jobs=1):
+    """Transcode items and copy their sibling files with up to `jobs` items in flight; returns failures."""
+    semaphore = asyncio.Semaphore(jobs)
+    failed_files = []
+
+    async def process(p):
+        async with semaphore:
+            try:
+                await transcode_item(p, source_root, destination_root)
+                print("⏳ COPYING ITEM FILES TO DESTINATION")
+                await asyncio.to_thread(copy_item_siblings, p, source_root, destination_root)
+                print("✅ COPIED ITEM FILES")
+            except StageFailed as e:
+                failed_files.append((p.name, str(e)))
+            except Exception as e:
+                failed_files.append((p.name, f"Exception: {e}"))
+
+    await asyncio.gather(*(process(p) for p in video_paths))
+    return failed_files
+
+
+@supervised
+def main(video_paths, source_root: Path, destination_root: Path, jobs=1):
+    return asyncio.run(process_batch(video_paths, source_root, destination_root, jobs))
+
+
+def storage_key(path: Path):
+    """Mount point holding `path`; throughput is calibrated per storage location."""
+    path = path.resolve()
+    while not os.path.ismount(path) and path != path.parent:
+        path = path.parent
+    return path.as_posix()
+
+
+async def probe_source(filepath):
+    """Probe the first video stream's codec and frame size and the container duration."""
+    result = await SUPERVISOR.execute(
+        "probe",
         [
-            FFMPEG_CMD,
-            "-i",
-            output_mkv_path.as_posix(),
-            "-map",
-            "0:v",
-            "-map",
-            "0:a",
-            "-f",
-            "streamhash",
-            "-hash",
-            "md5",
-            "-",
+            FFPROBE_CMD,
+            "-v",
+            "error",
+            "-select_streams",
+            "v:0",
+            "-show_entries",
+            "stream=codec_name,width,height:format=duration",
+            "-of",
+            "json",
+            filepath,
         ],
-        capture_output=True,
-        text=True,
     )
-    if calculated_md5_mkv_streams.returncode != 0:
-        print("❌ MKV STREAMHASH FAILED")
-        print(calculated_md5_mkv_streams.stderr)
-        raise SystemExit("MKV streamhash failed")
-    calculated_md5_mkv_streams = calculated_md5_mkv_streams.stdout.strip()
-    # wait for MKV file MD5 calculation to complete
-    spinner = Spinner()
-    spinner.start("🤼 WAITING FOR MD5 COMPARISON TO COMPLETE")
-    calculated_md5_mkv_file = calculating_md5_mkv_file.communicate()[0].split()[0]
-    spinner.stop()
-    with open(transcode_log_path, "a") as f:
-        f.write(
-            "Calculated the MD5 checksum of the transcoded MKV file.\n\n"
+    try:
+        probed = json.loads(result.stdout or "{}")
+    except json.JSONDecodeError:
+        probed = {}
+    stream = (probed.get("streams") or [{}])[0]
+    try:
+        duration = float(probed.get("format", {}).get("duration"))
+    except (TypeError, ValueError):
+        duration = None
+    return {
+        "video_codec": stream.get("codec_name"),
+        "resolution": f"{stream['width']}x{stream['height']}" if stream.get("width") else None,
+        "duration": duration,
+    }
+
+
+def load_calibration(dst_path: Path):
+    """Collect finished items and whole-batch throughput from previous RUN.json files under dst/BATCHES."""
+    items = []
+    batches = []
+    for run_context_path in sorted(dst_path.glob(f"BATCHES/*/{RUN_CONTEXT_FILENAME}")):
+        try:
+            with open(run_context_path) as f:
+                run = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            continue
+        hostname = run.get("host", {}).get("hostname")
+        done = [
+            dict(item, hostname=hostname)
+            for item in run.get("items", [])
+            if item.get("status") == "done" and item.get("elapsed_seconds") and item.get("media", {}).get("duration")
+        ]
+        items.extend(done)
+        if done and run.get("elapsed_seconds") and len(done) == len(run["items"]):
+            batches.append(
+                {
+                    "hostname": hostname,
+                    "jobs": run.get("jobs", 1),
+                    "rate": sum(item["media"]["duration"] for item in done) / run["elapsed_seconds"],
+                }
+            )
+    return items, batches
+
+
+def calibrated_rate(items, media, storage):
+    """Media seconds encoded per wall-clock second, from the most specific matching calibration."""
+    keys = [
+        ("codec, resolution, storage", lambda i: (i["media"]["video_codec"], i["media"]["resolution"], i["storage"]) == (media["video_codec"], media["resolution"], storage)),
+        ("codec, resolution", lambda i: (i["media"]["video_codec"], i["media"]["resolution"]) == (media["video_codec"], media["resolution"])),
+        ("codec", lambda i: i["media"]["video_codec"] == media["video_codec"]),
+        ("all", lambda i: True),
+    ]
+    for label, matches in keys:
+        matched = [i for i in items if matches(i)]
+        if matched:
+            rate = sum(i["media"]["duration"] for i in matched) / sum(i["elapsed_seconds"] for i in matched)
+            size_ratios = [i["output_size"] / i["source_size"] for i in matched if i.get("output_size") and i.get("source_size")]
+            return rate, (sum(size_ratios) / len(size_ratios) if size_ratios else None), label
+    return DEFAULT_REALTIME_FACTOR, None, "uncalibrated"
+
+
+def recommend_jobs(batches, item_count):
+    """Best observed `--jobs` on this host, otherwise one job per ENCODE_THREADS cores."""
+    observed = {}
+    for batch in batches:
+        if batch["hostname"] == platform.node():
+            observed.setdefault(batch["jobs"], []).append(batch["rate"])
+    if observed:
+        jobs = max(observed, key=lambda j: sum(observed[j]) / len(observed[j]))
+        return jobs, sum(observed[jobs]) / len(observed[jobs])
+    return max(1, min(item_count, (os.cpu_count() or 1) // ENCODE_THREADS)), None
+
+
+def format_seconds(seconds):
+    return str(datetime.timedelta(seconds=round(seconds)))
+
+
+def format_size(size):
+    for unit in ["B", "KB", "MB", "GB", "TB"]:
+        if size < 1000 or unit == "TB":
+            return f"{size:.1f} {unit}"
+        size /= 1000
+
+
+async def plan_batch(video_paths, source_root: Path, dst_path: Path, jobs=1):
+    """Probe every source without encoding and predict per-item and total wall-clock time."""
+    items, batches = load_calibration(dst_path)
+    hostname_items = [i for i in items if i["hostname"] == platform.node()]
+    # prefer calibration from this machine when there is any
+    items = hostname_items or items
+    # NOTE bounded like process_batch so a large batch does not start every ffprobe at once
+    semaphore = asyncio.Semaphore(jobs)
+
+    async def probe(p):
+        async with semaphore:
+            return await probe_source(p.as_posix())
+
+    probes = await asyncio.gather(*(probe(p) for p in video_paths))
+    print(f"\n📋 PLAN FOR {len(video_paths)} ITEMS (calibrated from {len(items)} previous items)\n")
+    total_seconds = 0
+    total_media_seconds = 0
+    total_output_size = 0
+    unknown_output_size = False
+    for p, media in zip(video_paths, probes):
+        rate, size_ratio, label = calibrated_rate(items, media, storage_key(p))
+        seconds = (media["duration"] or 0) / rate
+        total_seconds += seconds
+        total_media_seconds += media["duration"] or 0
+        source_size = p.stat().st_size
+        if size_ratio is None:
+            unknown_output_size = True
+            output_size = "unknown size"
+        else:
+            total_output_size += source_size * size_ratio
+            output_size = format_size(source_size * size_ratio)
+        print(
+            f"  {p.relative_to(source_root)}: {media['video_codec']} {media['resolution']} "
+            f"{format_seconds(media['duration'] or 0)} {format_size(source_size)} "
+            f"➡️ {format_seconds(seconds)}, {output_size} [{label}]"
         )
-        f.write("Calculated MD5:\n")
-        f.write(f"```\n$ md5sum {output_mkv_path}\n{calculated_md5_mkv_file}  {output_mkv_path}\n```\n\n")
-    with open(output_mkv_md5_path, "w") as f:
-        f.write(calculated_md5_mkv_file)
-    # wait for source streamhash MD5 calculation to complete
-    spinner = Spinner()
-    spinner.start("🤼 WAITING FOR MD5 COMPARISON TO COMPLETE")
-    source_streamhash_stdout, source_streamhash_stderr = calculating_md5_source_streams.communicate()
-    spinner.stop()
-    if calculating_md5_source_streams.returncode != 0:
-        print("❌ SOURCE STREAMHASH FAILED")
-        print(source_streamhash_stderr)
-        raise SystemExit("Source streamhash failed")
-    calculated_md5_source_streams = source_streamhash_stdout.strip()
-    # compare MD5 hashes of source audio/video streams with MD5 hashes of transcoded MKV audio/video streams
-    print(f"{p.name} (streams):\n{calculated_md5_source_streams}")
-    print(f"{output_mkv_path.name} (streams):\n{calculated_md5_mkv_streams}")
-    source_hashes = parse_streamhash_lines(calculated_md5_source_streams)
-    mkv_hashes = parse_streamhash_lines(calculated_md5_mkv_streams)
-
-    if source_hashes["v"] != mkv_hashes["v"]:
-        print("❌ VIDEO STREAM MD5 MISMATCH")
-        raise SystemExit("Video stream MD5 mismatch")
-    print("✅ VIDEO STREAM MD5 MATCH")
-
-    source_audio_codecs = get_audio_stream_codecs(p.as_posix(), FFPROBE_CMD)
-    non_aac_audio_positions = [i for i, codec in enumerate(source_audio_codecs) if codec != "aac"]
-
-    if not source_hashes["a"] and not mkv_hashes["a"]:
-        print("✅ NO AUDIO STREAM HASHES TO COMPARE")
-    elif not non_aac_audio_positions:
-        print("ℹ️ SKIPPING AUDIO STREAM MD5 CHECK (all source audio streams are AAC)")
+    jobs, batch_rate = recommend_jobs(batches, len(video_paths))
+    if batch_rate:
+        expected_total = total_media_seconds / batch_rate
     else:
-        if len(source_hashes["a"]) <= max(non_aac_audio_positions) or len(mkv_hashes["a"]) <= max(non_aac_audio_positions):
-            print("❌ AUDIO STREAM HASH EXTRACTION FAILED")
-            print(f"Source audio codec count: {len(source_audio_codecs)}")
-            print(f"Source non-AAC positions: {non_aac_audio_positions}")
-            print(f"Source audio hash count: {len(source_hashes['a'])}")
-            print(f"MKV audio hash count: {len(mkv_hashes['a'])}")
-            print(f"Source codecs: {source_audio_codecs}")
-            print(f"Source hashes (a): {source_hashes['a']}")
-            print(f"MKV hashes (a): {mkv_hashes['a']}")
-            raise SystemExit("Audio stream hash extraction failed: streamhash output did not include all expected audio streams")
-
-        source_non_aac_hashes = [source_hashes["a"][i] for i in non_aac_audio_positions]
-        mkv_non_aac_hashes = [mkv_hashes["a"][i] for i in non_aac_audio_positions]
-
-        if source_non_aac_hashes != mkv_non_aac_hashes:
-            print("❌ NON-AAC AUDIO STREAM MD5 MISMATCH")
-            raise SystemExit("Non-AAC audio stream MD5 mismatch")
-        print("✅ NON-AAC AUDIO STREAM MD5 MATCH")
-    with open(transcode_log_path, "a") as f:
-        f.write(
-            "Compared the calculated MD5 stream hashes from the source file with those from the transcoded MKV file. Future stream hash calculations must use the same or a compatible version of FFmpeg, otherwise the output will differ.\n\n"
-        )
-        f.write("Source stream hashes:\n")
-        f.write(
-            f"```\n$ {FFMPEG_CMD} -i {p.name} -map 0:v -map 0:a -f streamhash -hash md5 -\n{calculated_md5_source_streams}\n```\n\n"
-        )
-        f.write("MKV stream hashes:\n")
-        f.write(
-            f"```\n$ {FFMPEG_CMD} -i {output_mkv_path.name} -map 0:v -map 0:a -f streamhash -hash md5 -\n{calculated_md5_mkv_streams}\n```\n\n"
-        )
+        expected_total = total_seconds / jobs
+    print(f"\n⏱️ expected total time: {format_seconds(expected_total)} with --jobs {jobs}")
+    print(f"💾 expected output size: {format_size(total_output_size)}{' (excluding items without calibration)' if unknown_output_size else ''}")
+    print(f"🧮 recommended --jobs for {platform.node()}: {jobs}\n")
 
-    print("\n✅ DONE\n")
-    return
 
 def is_video_file(path, video_exts=VIDEO_EXTS):
     return path.suffix.lower() in video_exts
@@ -587,6 +920,10 @@ if __name__ == "__main__":
     parser.add_argument('--ffmpeg', default='/home/linuxbrew/.linuxbrew/bin/ffmpeg', help='(optional) path to ffmpeg binary')
     parser.add_argument('--ffprobe', default='/home/linuxbrew/.linuxbrew/bin/ffprobe', help='(optional) path to ffprobe binary')
     parser.add_argument('--exclude', help='file extension to exclude from processing (e.g. mp4)', default=None)
+    parser.add_argument('--priority', action='append', type=parse_priority_override, default=[], metavar='STAGE=KEY=VALUE[,KEY=VALUE]', help=f"(optional, repeatable) scheduling for a stage ({', '.join(STAGE_PRIORITIES)}); keys: nice, ionice, cpus, cpu_weight, io_weight (e.g. md5sum=nice=19,ionice=idle,cpus=0-1)")
+    parser.add_argument('--cgroups', action='store_true', help='(optional) apply cpu_weight/io_weight with systemd-run scopes where available')
+    parser.add_argument('--jobs', type=int, default=1, help='(optional) number of items to transcode (or, with --plan, to probe) at the same time; output from concurrent items is interleaved')
+    parser.add_argument('--plan', action='store_true', help='(optional) probe the sources and predict batch duration and output size from previous runs in dst without encoding')
     args = parser.parse_args(args=None if sys.argv[1:] else ["--help"])
     src_path = Path(args.src)
     dst_path = Path(args.dst)
@@ -608,9 +945,38 @@ if __name__ == "__main__":
     if not ffprobe_path.exists() or not ffprobe_path.is_file():
         print("❌ INVALID FFPROBE PATH")
         exit(1)
+    if args.jobs < 1:
+        print("❌ INVALID JOBS VALUE")
+        exit(1)
     # SET GLOBAL VARIABLES
     FFMPEG_CMD = args.ffmpeg
     FFPROBE_CMD = args.ffprobe
+    SUPERVISOR = ProcessSupervisor(use_cgroups=args.cgroups)
+    for stage, overrides in args.priority:
+        SUPERVISOR.configure(stage, **overrides)
+    atexit.register(SUPERVISOR.cleanup)
+    signal.signal(signal.SIGINT, handle_sigint)
+
+    # Find all video files (common extensions)
+    video_exts = VIDEO_EXTS.copy()
+    if args.exclude:
+        exclude_ext = args.exclude.lower().strip(".")
+        video_exts = [ext for ext in video_exts if ext.lstrip(".") != exclude_ext]
+    if args.level == "parent":
+        source_video_root = src_path
+        video_paths = [p for ext in video_exts for p in source_video_root.glob(f"**/*{ext}")]
+    else:
+        source_video_root = src_path.parent
+        video_paths = [src_path] if src_path.suffix.lower() in video_exts else []
+    # NOTE as before --jobs, only a single object without a video file is an error
+    if args.level == "object" and not video_paths:
+        print("❌ NO VIDEO FILES FOUND TO PROCESS")
+        sys.exit(1)
+    video_paths = sorted(video_paths, key=lambda x: x.stat().st_size)
+
+    if args.plan:
+        supervised(asyncio.run)(plan_batch(video_paths, source_video_root, dst_path, args.jobs))
+        sys.exit(0)
 
     # Process source media in place and write derivatives to a timestamped batch directory.
     batches_directory = dst_path.joinpath(
@@ -618,52 +984,25 @@ if __name__ == "__main__":
         datetime.datetime.now().isoformat(sep="-", timespec="seconds").replace(":", "")
     )
     batches_directory.mkdir(parents=True)
+    RUN_CONTEXT_PATH = batches_directory.joinpath(RUN_CONTEXT_FILENAME)
+    RUN_CONTEXT = capture_run_context(args, batches_directory)
+    write_run_context()
 
     if args.level == "parent":
         destination_root = batches_directory
-        source_video_root = src_path
     elif args.level == "object":
         destination_root = batches_directory.joinpath(src_path.stem)
         destination_root.mkdir(parents=True)
-        source_video_root = src_path.parent
     else:
         print("❌ PROBLEM PREPARING DESTINATION")
         exit(1)
 
-    # Find all video files (common extensions)
-    video_exts = VIDEO_EXTS.copy()
-    if args.exclude:
-        exclude_ext = args.exclude.lower().strip(".")
-        video_exts = [ext for ext in video_exts if ext.lstrip(".") != exclude_ext]
-    if args.level == "parent":
-        video_paths = [p for ext in video_exts for p in source_video_root.glob(f"**/*{ext}")]
-    else:
-        video_paths = [src_path] if src_path.suffix.lower() in video_exts else []
-    failed_files = []
-    if args.level == "parent":
-        for p in sorted(video_paths, key=lambda x: x.stat().st_size):
-            try:
-                main(p, source_video_root, destination_root)
-                print("⏳ COPYING ITEM FILES TO DESTINATION")
-                copy_item_siblings(p, source_video_root, destination_root)
-                print("✅ COPIED ITEM FILES")
-            except SystemExit as e:
-                failed_files.append((p.name, str(e)))
-            except Exception as e:
-                failed_files.append((p.name, f"Exception: {e}"))
-        if failed_files:
-            print("\nSummary of failed files:")
-            for fname, reason in failed_files:
-                print(f"  {fname}: {reason}")
-            sys.exit(1)
-    elif args.level == "object":
-        if not video_paths:
-            print("❌ NO VIDEO FILES FOUND TO PROCESS")
-            sys.exit(1)
-        main(video_paths[0], source_video_root, destination_root)
-        print("⏳ COPYING ITEM FILES TO DESTINATION")
-        copy_item_siblings(video_paths[0], source_video_root, destination_root)
-        print("✅ COPIED ITEM FILES")
-    else:
-        print("❌ UNEXPECTED ERROR")
-        exit(1)
+    batch_started = time.monotonic()
+    failed_files = main(video_paths, source_video_root, destination_root, args.jobs)
+    RUN_CONTEXT["elapsed_seconds"] = round(time.monotonic() - batch_started, 3)
+    write_run_context()
+    if failed_files:
+        print("\nSummary of failed files:")
+        for fname, reason in failed_files:
+            print(f"  {fname}: {reason}")
+        sys.exit(1)